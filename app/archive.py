@@ -0,0 +1,169 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+create table if not exists messages (
+    id integer primary key,
+    ts real not null,
+    direction text not null,
+    kind text not null,
+    player text not null collate nocase,
+    content text not null
+);
+create index if not exists messages_ts on messages (ts);
+create index if not exists messages_player_ts on messages (player, ts);
+create virtual table if not exists messages_fts using fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+create trigger if not exists messages_ai after insert on messages begin
+    insert into messages_fts (rowid, content) values (new.id, new.content);
+end;
+create trigger if not exists messages_ad after delete on messages begin
+    insert into messages_fts (messages_fts, rowid, content) values ('delete', old.id, old.content);
+end;
+"""
+
+PRUNE_INTERVAL_SECONDS = 3600
+OPTIMIZE_INTERVAL_SECONDS = 24 * 3600
+PRUNE_CHUNK_ROWS = 5000
+
+
+def fts_query(text: str) -> str:
+    # Nutzereingabe → FTS5-Ausdruck: jedes Wort als Präfix-Phrase, alle müssen vorkommen
+    terms = [term.replace('"', '""') for term in (text or "").split()]
+    return " ".join(f'"{term}"*' for term in terms if term)
+
+
+class ChatArchive:
+    # Lokales Archiv aller Brücken-Nachrichten (SQLite + FTS5). Schreiben gepuffert und
+    # gebündelt im Thread, Suche über den Volltextindex bzw. (player, ts)-Index.
+
+    def __init__(self, path: str, logger, retention_days: int = 365, flush_seconds: float = 2.0, batch_size: int = 500):
+        self._logger = logger
+        self._retention_seconds = retention_days * 86400 if retention_days > 0 else None
+        self._flush_seconds = flush_seconds
+        self._batch_size = batch_size
+        self._buffer = []
+        self._wakeup = asyncio.Event()
+        # Getrennte Verbindungen: Suchen laufen (WAL) parallel zum Schreiben
+        self._writer = self._connect(path)
+        self._writer.executescript(_SCHEMA)
+        self._reader = self._connect(path)
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self.counters = {"archived": 0, "pruned": 0}
+
+    @staticmethod
+    def _connect(path: str):
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("pragma journal_mode=wal")
+        db.execute("pragma synchronous=normal")
+        return db
+
+    def record(self, direction: str, kind: str, player: str, content: str) -> None:
+        self._buffer.append((time.time(), direction, kind, player or "?", content or ""))
+        if len(self._buffer) >= self._batch_size:
+            self._wakeup.set()
+
+    def _insert_many(self, rows) -> None:
+        with self._write_lock:
+            self._writer.execute("begin")
+            try:
+                self._writer.executemany(
+                    "insert into messages (ts, direction, kind, player, content) values (?, ?, ?, ?, ?)", rows
+                )
+                self._writer.execute("commit")
+            except Exception:
+                self._writer.execute("rollback")
+                raise
+
+    def _prune(self) -> int:
+        # In Häppchen löschen, damit Suchen nicht lange auf den Schreib-Lock warten
+        cutoff = time.time() - self._retention_seconds
+        total = 0
+        while True:
+            with self._write_lock:
+                deleted = self._writer.execute(
+                    "delete from messages where id in (select id from messages where ts < ? order by ts limit ?)",
+                    (cutoff, PRUNE_CHUNK_ROWS),
+                ).rowcount
+            total += deleted
+            if deleted < PRUNE_CHUNK_ROWS:
+                return total
+
+    def _optimize(self) -> None:
+        # Segmente des FTS-Index zusammenführen (Kompaktierung)
+        with self._write_lock:
+            self._writer.execute("insert into messages_fts (messages_fts) values ('optimize')")
+
+    async def flush(self) -> None:
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._insert_many, rows)
+            self.counters["archived"] += len(rows)
+        except Exception as exc:
+            self._logger.warning("Chat-Archiv: %d Nachrichten nicht gespeichert: %s", len(rows), exc)
+
+    async def serve(self, heartbeat=None) -> None:
+        last_prune = 0.0
+        last_optimize = time.monotonic()
+        try:
+            while True:
+                if heartbeat:
+                    heartbeat()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+                if self._retention_seconds and time.monotonic() - last_prune > PRUNE_INTERVAL_SECONDS:
+                    last_prune = time.monotonic()
+                    pruned = await asyncio.to_thread(self._prune)
+                    if pruned:
+                        self.counters["pruned"] += pruned
+                        self._logger.info("Chat-Archiv: %d alte Nachrichten gelöscht", pruned)
+                if time.monotonic() - last_optimize > OPTIMIZE_INTERVAL_SECONDS:
+                    last_optimize = time.monotonic()
+                    await asyncio.to_thread(self._optimize)
+        finally:
+            await self.flush()
+
+    def search(self, query: str = None, player: str = None, since: float = None, until: float = None, limit: int = 10, offset: int = 0):
+        # Blockierend (per asyncio.to_thread aufrufen); liefert (Treffer, weitere Seite vorhanden?)
+        where, params = [], []
+        if player:
+            where.append("m.player = ?")
+            params.append(player)
+        if since is not None:
+            where.append("m.ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("m.ts < ?")
+            params.append(until)
+        match = fts_query(query)
+        if match:
+            sql = "select m.ts, m.direction, m.kind, m.player, m.content from messages_fts f join messages m on m.id = f.rowid"
+            where.insert(0, "messages_fts match ?")
+            params.insert(0, match)
+        else:
+            sql = "select m.ts, m.direction, m.kind, m.player, m.content from messages m"
+        if where:
+            sql += " where " + " and ".join(where)
+        # id wächst mit ts; FTS5 kann absteigend nach rowid scannen und nach "limit" abbrechen
+        sql += (" order by f.rowid desc" if match else " order by m.ts desc") + " limit ? offset ?"
+        params += [limit + 1, offset]
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return rows[:limit], len(rows) > limit
+
+    def close(self) -> None:
+        for db in (self._writer, self._reader):
+            try:
+                db.close()
+            except Exception:
+                pass
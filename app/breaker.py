@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # closed → (N Fehler) → open → (reset_timeout) → half_open → Probe ok → closed
+    # Solange offen, schlagen Aufrufe sofort fehl statt in den Connect-Timeout zu laufen.
+
+    def __init__(self, name: str, logger, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self._logger = logger
+        self._failure_threshold = max(failure_threshold, 1)
+        self._reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and time.monotonic() - self.opened_at >= self._reset_timeout:
+            self._set_state(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN and not self._trial_in_flight:
+            # Genau ein Probeaufruf im halboffenen Zustand
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} nicht erreichbar (Circuit offen)")
+
+    def record_success(self) -> None:
+        self._trial_in_flight = False
+        self.failures = 0
+        if self.state != STATE_CLOSED:
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self, exc=None) -> None:
+        self._trial_in_flight = False
+        self.failures += 1
+        if exc is not None:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+        if self.state == STATE_HALF_OPEN or (self.state == STATE_CLOSED and self.failures >= self._failure_threshold):
+            self.opened_at = time.monotonic()
+            self._set_state(STATE_OPEN)
+        elif self.state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            self._logger.info("Circuit %s: %s → %s", self.name, self.state, state)
+            self.state = state
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "open_for_seconds": int(time.monotonic() - self.opened_at) if self.state != STATE_CLOSED and self.opened_at else 0,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+    async def monitor(self, probe, heartbeat=None) -> None:
+        # Probt im Hintergrund, solange der Circuit offen ist; probe() ist blockierend
+        while True:
+            if heartbeat:
+                heartbeat()
+            if self.state != STATE_CLOSED and self.allow():
+                try:
+                    await asyncio.to_thread(probe)
+                    self.record_success()
+                except Exception as exc:
+                    self.record_failure(exc)
+            await asyncio.sleep(min(self._reset_timeout, 5.0))
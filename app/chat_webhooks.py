@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+
+import aiohttp
+import discord
+
+WEBHOOK_NAME_PREFIX = "betterMCbot-chat-"
+MOJANG_PROFILE_URL = "https://api.mojang.com/users/profiles/minecraft/{name}"
+AVATAR_URL = "https://mc-heads.net/avatar/{key}"
+# Fehlgeschlagene Lookups nicht bei jeder Nachricht wiederholen (Lookup liegt im Zustellpfad)
+UNKNOWN_NAME_RETRY_SECONDS = 24 * 3600  # 204/404: unbekannter bzw. Offline-Mode-Name
+LOOKUP_ERROR_RETRY_SECONDS = 600        # 429, 5xx, Timeout
+
+
+class WebhookPool:
+    # Sendet MC-Chat über mehrere Channel-Webhooks mit Spielername + Skin-Avatar.
+    # Jeder Webhook hat ein eigenes Rate-Limit-Bucket → Durchsatz skaliert mit der Poolgröße.
+
+    def __init__(self, size: int, avatar_cache_path: str, logger):
+        self._size = max(size, 1)
+        self._avatar_cache_path = avatar_cache_path
+        self._logger = logger
+        self._channel_id = None
+        self._webhooks = []
+        self._cycle = None
+        self._lock = asyncio.Lock()
+        self._unavailable_channel = None
+        self._avatars = self._load_avatars()  # name.lower() → Avatar-URL
+        self._lookups = {}
+        self._fallbacks = {}  # name.lower() → (Fallback-URL, erneuter Lookup ab monotonic)
+        self._session = None
+
+    def _load_avatars(self) -> dict:
+        try:
+            with open(self._avatar_cache_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+        return {}
+
+    def _save_avatars(self, data: dict) -> None:
+        tmp = self._avatar_cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, self._avatar_cache_path)
+
+    async def _lookup_avatar(self, name: str) -> str:
+        # UUID-basierte URL bleibt auch nach Namensänderungen korrekt
+        url = AVATAR_URL.format(key=name)
+        retry_after = LOOKUP_ERROR_RETRY_SECONDS
+        try:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=3))
+            async with self._session.get(MOJANG_PROFILE_URL.format(name=name)) as resp:
+                if resp.status in (204, 404):
+                    retry_after = UNKNOWN_NAME_RETRY_SECONDS
+                if resp.status != 200:
+                    raise RuntimeError(f"Mojang HTTP {resp.status}")
+                data = await resp.json()
+            url = AVATAR_URL.format(key=data["id"])
+        except Exception:
+            self._fallbacks[name.lower()] = (url, time.monotonic() + retry_after)
+            return url
+        self._fallbacks.pop(name.lower(), None)
+        self._avatars[name.lower()] = url
+        try:
+            await asyncio.to_thread(self._save_avatars, dict(self._avatars))
+        except Exception as exc:
+            self._logger.debug("Avatar-Cache konnte nicht gespeichert werden: %s", exc)
+        return url
+
+    async def avatar_url(self, name: str) -> str:
+        cached = self._avatars.get(name.lower())
+        if cached:
+            return cached
+        fallback = self._fallbacks.get(name.lower())
+        if fallback is not None and fallback[1] > time.monotonic():
+            return fallback[0]
+        # Gleichzeitige Nachrichten desselben Spielers teilen sich einen Lookup
+        lookup = self._lookups.get(name.lower())
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup_avatar(name))
+            self._lookups[name.lower()] = lookup
+            lookup.add_done_callback(lambda _: self._lookups.pop(name.lower(), None))
+        return await asyncio.shield(lookup)
+
+    async def _ensure(self, channel) -> bool:
+        async with self._lock:
+            if self._unavailable_channel == channel.id:
+                return False
+            if self._channel_id == channel.id and self._webhooks:
+                return True
+            try:
+                existing = [w for w in await channel.webhooks() if (w.name or "").startswith(WEBHOOK_NAME_PREFIX) and w.token]
+                hooks = existing[:self._size]
+                for index in range(len(hooks), self._size):
+                    hooks.append(await channel.create_webhook(name=f"{WEBHOOK_NAME_PREFIX}{index + 1}"))
+            except discord.Forbidden:
+                # Ohne "Webhooks verwalten" bleibt es beim normalen channel.send
+                self._logger.warning("Keine Berechtigung für Webhooks in #%s, MC-Chat läuft über den Bot-Account", channel)
+                self._unavailable_channel = channel.id
+                return False
+            self._channel_id = channel.id
+            self._webhooks = hooks
+            self._cycle = itertools.cycle(hooks)
+            self._logger.info("Chat-Webhooks bereit: %d in #%s", len(hooks), channel)
+            return True
+
+    def reset(self) -> None:
+        self._channel_id = None
+        self._webhooks = []
+        self._cycle = None
+
+    async def send(self, channel, author: str, content: str) -> bool:
+        # False → Pool nicht nutzbar, Aufrufer sendet selbst
+        avatar_url = await self.avatar_url(author)
+        for _ in range(2):
+            if not await self._ensure(channel):
+                return False
+            webhook = next(self._cycle)
+            try:
+                await webhook.send(content, username=author[:80], avatar_url=avatar_url)
+                return True
+            except discord.NotFound:
+                # Webhook wurde gelöscht → Pool neu aufbauen und einmal wiederholen
+                self.reset()
+            except discord.HTTPException as exc:
+                # z. B. von Discord abgelehnter Anzeigename → als normale Nachricht senden
+                if exc.status == 400:
+                    return False
+                raise
+        return False
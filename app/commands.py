@@ -1,25 +1,44 @@
+import asyncio
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
+from app.rcon import PRIORITY_ADMIN
+from app.whitelist import parse_name_list, import_whitelist, add_to_whitelist, is_valid_name, MAX_IMPORT_NAMES
+
+CHAT_SEARCH_PAGE_SIZE = 10
+
+
+def _format_duration(seconds: int) -> str:
+    hours, remainder = divmod(int(seconds), 3600)
+    return f"{hours} Std {remainder // 60} Min"
 
 def register_text_commands(bot: commands.Bot, deps):
-    mcipc_Client = deps["mcipc_Client"]
-    QueryClient = deps["QueryClient"]
+    query_stats = deps["query_stats"]
+    rcon = deps["rcon"]
+    whitelist_cache = deps["whitelist"]
 
     @bot.command(name='whitelistadd')
     async def whitelistadd(ctx, *, arg):
         if deps["CHAT_CHANNEL_ID_INT"] and ctx.channel.id != deps["CHAT_CHANNEL_ID_INT"]:
             return
-        name = arg
+        name = arg.strip()
+        # Wie beim Import: nur gültige Namen an "whitelist add" weiterreichen
+        if not is_valid_name(name):
+            await ctx.send("Ungültiger Spielername.")
+            return
         try:
             if not deps["HAS_RCON"]:
                 await ctx.send("Minecraft-RCON ist nicht konfiguriert.")
                 return
-            with mcipc_Client(deps["SERVER_IP"], deps["RCON_PORT_INT"], passwd=deps["RCON_PASSWORD"]) as client:
-                whitelist = client.whitelist
-                whitelist.add(name)
+            result = await add_to_whitelist(rcon, whitelist_cache, name, PRIORITY_ADMIN)
+            if result == "present":
+                await ctx.send("Spieler " + name + " ist bereits auf der Whitelist")
+            elif result == "added":
                 await ctx.send("Spieler " + name + " wurde zur Whitelist hinzugefügt")
+            else:
+                await ctx.send("Spieler " + name + " konnte nicht hinzugefügt werden")
         except Exception:
             await ctx.send("Server nicht erreichbar")
 
@@ -27,17 +46,37 @@ def register_text_commands(bot: commands.Bot, deps):
     async def ping(ctx):
         if deps["CHAT_CHANNEL_ID_INT"] and ctx.channel.id != deps["CHAT_CHANNEL_ID_INT"]:
             return
+        # Status-Embed und Presence pflegt nur der Primärprozess; sonst direkt per Query fragen
+        primary = deps.get("is_primary", True)
+        board = deps.get("status_board")
+        if primary and board is not None and board.jump_url:
+            # Status steht im angepinnten Embed; Verweis und Aufruf räumen sich nach einer Minute weg
+            sent = await ctx.send(f"Aktueller Serverstatus: {board.jump_url}")
+            deps["ephemeral"].track(ctx.channel.id, sent.id, ttl=60)
+            deps["ephemeral"].track(ctx.channel.id, ctx.message.id, ttl=60)
+            return
+        presence = deps.get("presence")
+        if primary and presence is not None and presence.is_known():
+            # Antwort aus dem Presence-Tracker, ohne Query-Roundtrip
+            if presence.reachable is False:
+                await ctx.send("Server ist offline")
+                return
+            players = presence.online()
+            ans = "Server ist online mit " + str(len(players)) + "/" + str(presence.max_players or "?") + " Spielern:"
+            for player in players:
+                ans += "\n\t" + player
+            await ctx.send(ans)
+            return
         try:
             if not deps["HAS_QUERY"]:
                 await ctx.send("Minecraft-Query ist nicht konfiguriert.")
                 return
-            with QueryClient(deps["SERVER_IP"], deps["QUERY_PORT_INT"]) as client:
-                status = client.stats(full=True)
-                ans = "Server ist online mit " + str(status['num_players']) + "/" + str(
-                    status['max_players']) + " Spielern:"
-                for player in status['players']:
-                    ans += "\n\t" + player
-                await ctx.send(ans)
+            status = await asyncio.to_thread(query_stats, True)
+            ans = "Server ist online mit " + str(status['num_players']) + "/" + str(
+                status['max_players']) + " Spielern:"
+            for player in status['players']:
+                ans += "\n\t" + player
+            await ctx.send(ans)
         except Exception:
             await ctx.send("Server ist offline")
 
@@ -60,69 +99,23 @@ def register_text_commands(bot: commands.Bot, deps):
         if remaining.total_seconds() <= 0:
             await ctx.send("Der Zeitpunkt ist bereits erreicht.")
             return
-        # Vorherige Bot-Countdown-Nachricht + vorherige Trigger-Nachricht löschen
-        get_last = deps.get("get_last_msg_id")
-        set_last = deps.get("set_last_msg_id")
-        get_trig = deps.get("get_last_trigger_id")
-        set_trig = deps.get("set_last_trigger_id")
-        get_last_auto = deps.get("get_last_auto_msg_id")
-        if get_last:
-            try:
-                last_id = get_last()
-                if last_id:
-                    try:
-                        old = await ctx.channel.fetch_message(last_id)
-                        if old and old.author == bot.user:
-                            await old.delete()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        else:
-            last_id = None
-        if get_last_auto:
-            try:
-                auto_id = get_last_auto()
-                if auto_id and auto_id != last_id:
-                    try:
-                        old_auto = await ctx.channel.fetch_message(auto_id)
-                        if old_auto and old_auto.author == bot.user:
-                            await old_auto.delete()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        if get_trig:
-            try:
-                trig_id = get_trig()
-                if trig_id and trig_id != ctx.message.id:
-                    try:
-                        old_trig = await ctx.channel.fetch_message(trig_id)
-                        if old_trig:
-                            await old_trig.delete()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        # Aktuelle Nachricht stehen lassen, neue Antwort senden und IDs speichern
+        # Neue Antwort ersetzt vorige Countdown-Antworten (manuell + automatisch) und den vorigen Trigger;
+        # die aktuelle Trigger-Nachricht bleibt bis zum nächsten Aufruf stehen
+        ephemeral = deps["ephemeral"]
+        ephemeral.expire("countdown_auto")
         sent = await ctx.send("Verbleibende Zeit: " + _format_precise_delta(remaining))
-        if set_last:
-            set_last(sent.id)
-        if set_trig:
-            set_trig(ctx.message.id)
+        ephemeral.track(ctx.channel.id, sent.id, kind="countdown_manual")
+        ephemeral.track(ctx.channel.id, ctx.message.id, kind="countdown_trigger")
 
 
 def register_slash_commands(bot: commands.Bot, deps):
-    load_config = deps["load_config"]
-    save_config = deps["save_config"]
+    update_config = deps["update_config"]
 
     @bot.tree.command(name="set_server_channel", description="Setzt den Discord-Channel für die Minecraft-Brücke")
     @app_commands.describe(channel="Ziel-Channel für Brücke")
     @app_commands.default_permissions(manage_guild=True)
     async def set_server_channel(interaction: discord.Interaction, channel: discord.TextChannel):
-        data = load_config()
-        data["chat_channel_id"] = channel.id
-        save_config(data)
+        data = update_config({"chat_channel_id": channel.id})
         deps["apply_config"](data)
         await interaction.response.send_message(f"Brücken-Channel gesetzt auf {channel.mention}.", ephemeral=True)
 
@@ -134,12 +127,10 @@ def register_slash_commands(bot: commands.Bot, deps):
         if "/" not in repo:
             await interaction.response.send_message("Ungültiges Repo-Format. Erwartet: owner/repo", ephemeral=True)
             return
-        data = load_config()
-        data["github_repo"] = repo
-        data["github_updates_channel_id"] = channel.id
+        changes = {"github_repo": repo, "github_updates_channel_id": channel.id}
         if poll_interval_seconds and poll_interval_seconds > 0:
-            data["github_poll_interval_seconds"] = poll_interval_seconds
-        save_config(data)
+            changes["github_poll_interval_seconds"] = poll_interval_seconds
+        data = update_config(changes)
         deps["apply_config"](data)
         deps["reset_last_commit"]()
         await interaction.response.send_message(f"GitHub-Updates gesetzt: {repo} → {channel.mention}.", ephemeral=True)
@@ -147,10 +138,7 @@ def register_slash_commands(bot: commands.Bot, deps):
     @bot.tree.command(name="disable_github", description="Deaktiviert GitHub-Commit-Updates")
     @app_commands.default_permissions(manage_guild=True)
     async def disable_github(interaction: discord.Interaction):
-        data = load_config()
-        data.pop("github_repo", None)
-        data.pop("github_updates_channel_id", None)
-        save_config(data)
+        data = update_config(remove=("github_repo", "github_updates_channel_id"))
         deps["apply_config"](data)
         await interaction.response.send_message("GitHub-Updates deaktiviert.", ephemeral=True)
 
@@ -160,6 +148,215 @@ def register_slash_commands(bot: commands.Bot, deps):
         data = deps["collect_config_display"]()
         await interaction.response.send_message(f"```json\n{data}\n```", ephemeral=True)
 
+    @bot.tree.command(name="bot_status", description="Zeigt Status und letzte Laufzeit der Hintergrundjobs")
+    @app_commands.default_permissions(manage_guild=True)
+    async def bot_status(interaction: discord.Interaction):
+        jobs = deps["job_status"]()
+        health = deps["health_status"]()
+        circuits = health["circuits"]
+        status_line = ", ".join(f"{name.upper()}: {info['state']}" for name, info in circuits.items() if info)
+        lines = [f"**Status:** {status_line or 'kein Minecraft-Server konfiguriert'}"]
+        link = health.get("mod_link")
+        if link:
+            state = "verbunden" if link["connected"] else "getrennt (RCON-Fallback)"
+            lines.append(f"**Mod-Link:** {state}, {link['events']} Events, {link['sent']} Chatzeilen, {link['unacked']} unbestätigt")
+        echo = health.get("echo")
+        if echo:
+            lines.append(f"**Echo-Schutz:** {echo['suppressed_minecraft']} aus Minecraft, {echo['suppressed_discord']} aus Discord unterdrückt")
+        process = health["process"]
+        if process["shard_count"]:
+            lines.append(f"**Prozess:** Shards {process['shard_ids'] or 'alle'} von {process['shard_count']}, Primär: {'ja' if process['primary'] else 'nein'}")
+            for shard_id, shard in health["shards"].items():
+                latency = f"{shard['latency_ms']} ms" if shard["latency_ms"] is not None else "–"
+                lines.append(f"`Shard {shard_id}`: {latency}, {shard['guilds']} Guilds, {shard['messages']} Nachrichten, Reconnects {shard['disconnects']}")
+        if not jobs:
+            lines.append("Keine Hintergrundjobs aktiv.")
+        for name, info in sorted(jobs.items()):
+            line = f"`{name}`: {info['state']}, letzter Lauf {info['last_run'] or '-'}, Neustarts {info['restarts']}"
+            if info["last_error"]:
+                line += f"\n  letzter Fehler: {info['last_error']}"
+            lines.append(line)
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @bot.tree.command(name="online", description="Zeigt die aktuell eingeloggten Minecraft-Spieler")
+    async def online(interaction: discord.Interaction):
+        presence = deps["presence"]
+        if not deps.get("is_primary", True):
+            # Join/Leave-Events erreichen nur den Primärprozess → Spielerliste live per Query
+            if not deps["HAS_QUERY"]:
+                await interaction.response.send_message("Die Spielerliste führt der Primärprozess; in dieser Guild nicht verfügbar.", ephemeral=True)
+                return
+            await interaction.response.defer(ephemeral=True)
+            try:
+                status = await asyncio.to_thread(deps["query_stats"], True)
+            except Exception:
+                await interaction.followup.send("Server ist offline.", ephemeral=True)
+                return
+            if not status["players"]:
+                await interaction.followup.send("Niemand ist online.", ephemeral=True)
+                return
+            lines = [f"**{status['num_players']}/{status['max_players']} Spieler online:**"] + list(status["players"])
+            await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+            return
+        if not presence.is_known():
+            await interaction.response.send_message("Noch keine Spielerdaten vorhanden.", ephemeral=True)
+            return
+        if presence.reachable is False:
+            await interaction.response.send_message("Server ist offline.", ephemeral=True)
+            return
+        sessions = presence.sessions()
+        if not sessions:
+            await interaction.response.send_message("Niemand ist online.", ephemeral=True)
+            return
+        lines = [f"**{len(sessions)}/{presence.max_players or '?'} Spieler online:**"]
+        for name, seconds in sessions:
+            lines.append(f"{name} – seit {seconds // 3600} Std {(seconds % 3600) // 60} Min")
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    def _name_summary(names, limit=30):
+        if not names:
+            return "-"
+        shown = ", ".join(names[:limit])
+        return shown + (f" … (+{len(names) - limit})" if len(names) > limit else "")
+
+    @bot.tree.command(name="whitelist_import", description="Fügt Spieler aus einer Datei (CSV oder Zeilenliste) zur Whitelist hinzu")
+    @app_commands.describe(datei="CSV (Name in erster Spalte) oder ein Name pro Zeile")
+    @app_commands.default_permissions(administrator=True)
+    async def whitelist_import(interaction: discord.Interaction, datei: discord.Attachment):
+        if not deps["HAS_RCON"]:
+            await interaction.response.send_message("Minecraft-RCON ist nicht konfiguriert.", ephemeral=True)
+            return
+        if datei.size > 256 * 1024:
+            await interaction.response.send_message("Datei ist zu groß (max. 256 KB).", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            text = (await datei.read()).decode("utf-8-sig", errors="replace")
+        except Exception:
+            await interaction.followup.send("Datei konnte nicht gelesen werden.", ephemeral=True)
+            return
+        names, invalid, duplicates = parse_name_list(text)
+        if not names:
+            await interaction.followup.send("Keine gültigen Spielernamen gefunden.", ephemeral=True)
+            return
+        if len(names) > MAX_IMPORT_NAMES:
+            await interaction.followup.send(f"Zu viele Namen (max. {MAX_IMPORT_NAMES}).", ephemeral=True)
+            return
+        try:
+            summary = await import_whitelist(deps["rcon"], names, deps["whitelist"])
+        except Exception:
+            await interaction.followup.send("Server nicht erreichbar", ephemeral=True)
+            return
+        lines = [
+            f"**Whitelist-Import:** {len(summary['added'])} hinzugefügt, {len(summary['present'])} bereits vorhanden, {len(summary['failed'])} fehlgeschlagen",
+            f"Hinzugefügt: {_name_summary(summary['added'])}",
+            f"Bereits vorhanden: {_name_summary(summary['present'])}",
+            f"Fehlgeschlagen: {_name_summary(summary['failed'])}",
+        ]
+        if invalid or duplicates:
+            lines.append(f"Ignoriert: {len(invalid)} ungültig ({_name_summary(invalid, 10)}), {duplicates} doppelt")
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+
+    @bot.tree.command(name="whitelist_status", description="Prüft (aus dem lokalen Cache), ob ein Spieler auf der Whitelist steht")
+    @app_commands.describe(spieler="Minecraft-Name; leer lassen für eine Übersicht")
+    async def whitelist_status(interaction: discord.Interaction, spieler: Optional[str] = None):
+        cache = deps["whitelist"]
+        if not cache.is_synced():
+            await interaction.response.send_message("Whitelist wurde noch nicht synchronisiert.", ephemeral=True)
+            return
+        synced = f"<t:{int(cache.last_sync)}:R>"
+        if not spieler:
+            await interaction.response.send_message(f"{len(cache.names())} Spieler auf der Whitelist (Stand {synced}).", ephemeral=True)
+            return
+        spieler = spieler.strip()
+        if not is_valid_name(spieler):
+            await interaction.response.send_message("Ungültiger Spielername.", ephemeral=True)
+            return
+        state = "steht auf" if cache.contains(spieler) else "steht nicht auf"
+        await interaction.response.send_message(f"{spieler} {state} der Whitelist (Stand {synced}).", ephemeral=True)
+
+    @bot.tree.command(name="chat_search", description="Durchsucht das Archiv der Brücken-Nachrichten")
+    @app_commands.describe(
+        suche="Suchbegriffe (alle müssen vorkommen, Wortanfänge genügen)",
+        spieler="Nur Nachrichten dieses Spielers/Discord-Nutzers",
+        tage="Zeitraum in Tagen (Standard 7)",
+        seite="Ergebnisseite (Standard 1)",
+    )
+    @app_commands.default_permissions(manage_messages=True)
+    async def chat_search(interaction: discord.Interaction, suche: Optional[str] = None, spieler: Optional[str] = None, tage: Optional[int] = 7, seite: Optional[int] = 1):
+        archive = deps["archive"]
+        if archive is None:
+            await interaction.response.send_message("Das Chat-Archiv ist deaktiviert.", ephemeral=True)
+            return
+        if not (suche or spieler):
+            await interaction.response.send_message("Bitte Suchbegriffe und/oder einen Spieler angeben.", ephemeral=True)
+            return
+        page = max(seite or 1, 1)
+        since = time.time() - max(tage or 7, 1) * 86400
+        rows, more = await asyncio.to_thread(
+            archive.search, suche, (spieler or "").strip() or None, since, None, CHAT_SEARCH_PAGE_SIZE, (page - 1) * CHAT_SEARCH_PAGE_SIZE
+        )
+        if not rows:
+            await interaction.response.send_message("Keine Treffer.", ephemeral=True)
+            return
+        lines = [f"**Treffer (Seite {page}{', weitere vorhanden' if more else ''}):**"]
+        for ts, direction, kind, player, content in rows:
+            source = "MC" if direction == "minecraft" else "Discord"
+            text = f"{player}: {content}" if kind == "chat" else f"{player} {content}"
+            lines.append(f"<t:{int(ts)}:f> [{source}] {discord.utils.escape_mentions(text)[:180]}")
+        await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+    @bot.tree.command(name="leaderboard", description="Zeigt die Bestenliste der Minecraft-Spieler")
+    @app_commands.describe(kategorie="Rangliste (Standard: Tode)")
+    @app_commands.choices(kategorie=[
+        app_commands.Choice(name="Tode", value="deaths"),
+        app_commands.Choice(name="Spielzeit", value="playtime"),
+        app_commands.Choice(name="Chatnachrichten", value="chat"),
+        app_commands.Choice(name="Logins", value="joins"),
+    ])
+    async def leaderboard(interaction: discord.Interaction, kategorie: Optional[app_commands.Choice[str]] = None):
+        stats = deps["stats"]
+        metric = kategorie.value if kategorie else "deaths"
+        title = kategorie.name if kategorie else "Tode"
+        top = stats.top(metric)
+        if not top:
+            await interaction.response.send_message("Noch keine Daten vorhanden.", ephemeral=True)
+            return
+        lines = [f"**Bestenliste – {title}**"]
+        for rank, (name, value) in enumerate(top, start=1):
+            lines.append(f"{rank}. {name}: {_format_duration(value) if metric == 'playtime' else value}")
+        if metric == "deaths":
+            causes = stats.top_causes()
+            if causes:
+                lines.append("Häufigste Todesursachen: " + ", ".join(f"{cause} ({count})" for cause, count in causes))
+        await interaction.response.send_message("\n".join(lines)[:2000])
+
+    @bot.tree.command(name="stats", description="Zeigt die Statistik eines Minecraft-Spielers")
+    @app_commands.describe(spieler="Minecraft-Name")
+    async def stats(interaction: discord.Interaction, spieler: str):
+        record = deps["stats"].player(spieler.strip())
+        if record is None:
+            await interaction.response.send_message("Zu diesem Spieler gibt es noch keine Daten.", ephemeral=True)
+            return
+        # Laufende Session zur gespeicherten Spielzeit addieren
+        playtime = record["playtime"] + sum(seconds for name, seconds in deps["presence"].sessions() if name.lower() == spieler.strip().lower())
+        ranks = record["ranks"]
+
+        def _rank(metric):
+            return f" (Platz {ranks[metric]})" if metric in ranks else ""
+
+        lines = [
+            f"**Statistik für {record['name']}**",
+            f"Tode: {record['deaths']}{_rank('deaths')}",
+            f"Spielzeit: {_format_duration(playtime)}{_rank('playtime')}",
+            f"Chatnachrichten: {record['chat']}{_rank('chat')}",
+            f"Logins: {record['joins']}{_rank('joins')}",
+        ]
+        if record["causes"]:
+            causes = sorted(record["causes"].items(), key=lambda item: item[1], reverse=True)
+            lines.append("Todesursachen: " + ", ".join(f"{cause} ({count})" for cause, count in causes))
+        await interaction.response.send_message("\n".join(lines))
+
     @bot.tree.command(name="change_prefix", description="Ändert das Bot-Prefix für Textcommands")
     @app_commands.describe(prefix="Neues Prefix, z. B. ! oder --")
     @app_commands.default_permissions(manage_guild=True)
@@ -171,9 +368,7 @@ def register_slash_commands(bot: commands.Bot, deps):
         if len(prefix) > 5:
             await interaction.response.send_message("Prefix ist zu lang (max. 5 Zeichen).", ephemeral=True)
             return
-        data = load_config()
-        data["command_prefix"] = prefix
-        save_config(data)
+        data = update_config({"command_prefix": prefix})
         deps["apply_config"](data)
         await interaction.response.send_message(f"Prefix geändert auf `{prefix}`.", ephemeral=True)
 
@@ -182,17 +377,17 @@ def register_slash_commands(bot: commands.Bot, deps):
     @app_commands.default_permissions(manage_guild=True)
     async def set_cleanup(interaction: discord.Interaction, retention_hours: Optional[int] = None, interval_minutes: Optional[int] = None):
         changed = []
-        data = load_config()
+        changes = {}
         if retention_hours is not None and retention_hours >= 0:
-            data["message_cleanup_retention_hours"] = retention_hours
+            changes["message_cleanup_retention_hours"] = retention_hours
             changed.append(f"retention={retention_hours}h")
         if interval_minutes is not None and interval_minutes > 0:
-            data["message_cleanup_interval_minutes"] = interval_minutes
+            changes["message_cleanup_interval_minutes"] = interval_minutes
             changed.append(f"interval={interval_minutes}m")
         if not changed:
             await interaction.response.send_message("Keine Änderungen übergeben.", ephemeral=True)
             return
-        save_config(data)
+        data = update_config(changes)
         deps["apply_config"](data)
         await interaction.response.send_message("Cleanup aktualisiert: " + ", ".join(changed), ephemeral=True)
 
@@ -206,41 +401,45 @@ def register_slash_commands(bot: commands.Bot, deps):
         except Exception:
             await interaction.response.send_message("Ungültiges ISO-Datum. Beispiel: 2025-12-31T17:00", ephemeral=True)
             return
-        data = load_config()
-        data["countdown_channel_id"] = channel.id
-        data["countdown_target_iso"] = target_iso
-        data["countdown_timezone"] = tzname
-        save_config(data)
+        data = update_config({"countdown_channel_id": channel.id, "countdown_target_iso": target_iso, "countdown_timezone": tzname})
         deps["apply_config"](data)
         await interaction.response.send_message(f"Countdown gesetzt: {target_iso} ({tzname}) → {channel.mention}", ephemeral=True)
 
     @bot.tree.command(name="disable_countdown", description="Deaktiviert den Countdown")
     @app_commands.default_permissions(manage_guild=True)
     async def disable_countdown(interaction: discord.Interaction):
-        data = load_config()
-        data.pop("countdown_channel_id", None)
-        data.pop("countdown_target_iso", None)
-        data.pop("countdown_timezone", None)
-        save_config(data)
+        data = update_config(remove=("countdown_channel_id", "countdown_target_iso", "countdown_timezone"))
         deps["apply_config"](data)
         await interaction.response.send_message("Countdown deaktiviert.", ephemeral=True)
 
+    @bot.tree.command(name="set_status_channel", description="Setzt den Channel für das angepinnte Server-Status-Embed")
+    @app_commands.describe(channel="Channel für das Status-Embed")
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_status_channel(interaction: discord.Interaction, channel: discord.TextChannel):
+        # Neue Status-Nachricht im neuen Channel anlegen
+        data = update_config({"status_channel_id": channel.id}, remove=("status_message_id",))
+        deps["apply_config"](data)
+        await interaction.response.send_message(f"Status-Embed wird in {channel.mention} angezeigt.", ephemeral=True)
+
+    @bot.tree.command(name="disable_status", description="Deaktiviert das Server-Status-Embed")
+    @app_commands.default_permissions(manage_guild=True)
+    async def disable_status(interaction: discord.Interaction):
+        data = update_config(remove=("status_channel_id", "status_message_id"))
+        deps["apply_config"](data)
+        await interaction.response.send_message("Status-Embed deaktiviert.", ephemeral=True)
+
     @bot.tree.command(name="set_countdown_role", description="Setzt die zu erwähnende Rolle für Auto-Countdowns")
     @app_commands.describe(role="Rolle, die in automatischen Countdown-Nachrichten erwähnt wird")
     @app_commands.default_permissions(administrator=True)
     async def set_countdown_role(interaction: discord.Interaction, role: discord.Role):
-        data = load_config()
-        data["countdown_role_id"] = role.id
-        save_config(data)
+        data = update_config({"countdown_role_id": role.id})
         deps["apply_config"](data)
         await interaction.response.send_message(f"Countdown-Rolle gesetzt: {role.mention}", ephemeral=True)
 
     @bot.tree.command(name="disable_countdown_role", description="Entfernt die Rolle aus Auto-Countdowns")
     @app_commands.default_permissions(administrator=True)
     async def disable_countdown_role(interaction: discord.Interaction):
-        data = load_config()
-        data.pop("countdown_role_id", None)
-        save_config(data)
+        data = update_config(remove=("countdown_role_id",))
         deps["apply_config"](data)
         await interaction.response.send_message("Countdown-Rolle entfernt.", ephemeral=True)
 
@@ -251,20 +450,15 @@ def register_slash_commands(bot: commands.Bot, deps):
         if not message or not message.strip():
             await interaction.response.send_message("Die Nachricht darf nicht leer sein.", ephemeral=True)
             return
-        data = load_config()
-        data["countdown_timer_message"] = message.strip()
-        data["countdown_timer_message_sent"] = False  # Reset des Flags beim Setzen einer neuen Nachricht
-        save_config(data)
+        # Flag zurücksetzen, damit die neue Nachricht wieder gesendet wird
+        data = update_config({"countdown_timer_message": message.strip(), "countdown_timer_message_sent": False})
         deps["apply_config"](data)
         await interaction.response.send_message(f"Timer-Nachricht gespeichert:\n```\n{message.strip()}\n```", ephemeral=True)
 
     @bot.tree.command(name="clear_timer_message", description="Entfernt die gespeicherte Timer-Nachricht")
     @app_commands.default_permissions(manage_guild=True)
     async def clear_timer_message(interaction: discord.Interaction):
-        data = load_config()
-        data.pop("countdown_timer_message", None)
-        data.pop("countdown_timer_message_sent", None)
-        save_config(data)
+        data = update_config(remove=("countdown_timer_message", "countdown_timer_message_sent"))
         deps["apply_config"](data)
         await interaction.response.send_message("Timer-Nachricht entfernt.", ephemeral=True)
 
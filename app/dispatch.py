@@ -0,0 +1,31 @@
+ROUTE_COMMAND = "command"
+ROUTE_RELAY = "relay"
+
+
+def build_dispatch_table(command_prefix: str, mirror_channel_ids, bridge_active: bool) -> dict:
+    # Vorberechnete Tabelle für on_message: Prefixe pro Channel + Brücken-Channels
+    default_prefixes = (command_prefix,)
+    channel_prefixes = {}
+    for channel_id in mirror_channel_ids:
+        if channel_id:
+            # Im Mirror-Channel zusätzlich das klassische "-" erlauben
+            channel_prefixes[channel_id] = (command_prefix, "-")
+    bridge_channels = frozenset(cid for cid in mirror_channel_ids if cid) if bridge_active else frozenset()
+    return {
+        "default_prefixes": default_prefixes,
+        "channel_prefixes": channel_prefixes,
+        "bridge_channels": bridge_channels,
+    }
+
+
+def prefixes_for(table: dict, channel_id) -> tuple:
+    return table["channel_prefixes"].get(channel_id, table["default_prefixes"])
+
+
+def route_message(table: dict, channel_id, content: str):
+    # Liefert ROUTE_COMMAND, ROUTE_RELAY oder None (Nachricht ist irrelevant)
+    if content and content.startswith(prefixes_for(table, channel_id)):
+        return ROUTE_COMMAND
+    if channel_id in table["bridge_channels"]:
+        return ROUTE_RELAY
+    return None
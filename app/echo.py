@@ -0,0 +1,98 @@
+import hashlib
+import re
+import time
+from collections import deque
+
+TO_MINECRAFT = "minecraft"
+TO_DISCORD = "discord"
+
+_FORMATTING_RE = re.compile(r"§[0-9a-fk-or]", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+# "[Server] …" bzw. "[Rcon] …": so meldet der Server eigene say-Ausgaben
+_TAG_RE = re.compile(r"^\[[^\]]{1,32}\]\s*")
+# "[Discord] Name: …": Präfix einer fremden Bridge, die unsere Discord-Posts ins Spiel spiegelt
+_BRIDGE_PREFIX_RE = re.compile(r"^\[[^\]]{1,32}\]\s*[^:]{1,48}:\s*")
+# Trennzeichen, mit dem app.rcon Chatzeilen unter Last zusammenfasst
+MERGED_SEPARATOR = " | "
+
+
+def fingerprint(text: str) -> bytes:
+    normalized = _WHITESPACE_RE.sub(" ", _FORMATTING_RE.sub("", text or "")).strip().casefold()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+class EchoFilter:
+    # Fingerprints aller Zeilen, die der Bot in eine Richtung gesendet hat, mit kurzer TTL.
+    # Kommt eine davon als eingehendes Event zurück (Server-Echo von "say", zweite Bridge),
+    # wird sie verworfen, bevor Discord oder RCON angefasst werden.
+
+    def __init__(self, ttl_seconds: float = 15.0, max_entries: int = 10000):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._expires = {}  # (Richtung, Fingerprint) → Ablaufzeit
+        self._order = deque()  # (Ablaufzeit, Schlüssel); TTL ist fest, also zeitlich sortiert
+        self.counters = {"remembered": 0, "suppressed_minecraft": 0, "suppressed_discord": 0}
+
+    def _expire(self, now: float) -> None:
+        order = self._order
+        while order and (order[0][0] <= now or len(order) > self._max_entries):
+            expires, key = order.popleft()
+            if self._expires.get(key) == expires:
+                del self._expires[key]
+
+    def remember(self, direction: str, text: str, now: float = None) -> None:
+        if not text:
+            return
+        now = now if now is not None else time.monotonic()
+        key = (direction, fingerprint(text))
+        expires = now + self._ttl
+        self._expires[key] = expires
+        self._order.append((expires, key))
+        self.counters["remembered"] += 1
+        self._expire(now)
+
+    def _seen(self, direction: str, texts, now: float) -> bool:
+        for text in texts:
+            expires = self._expires.get((direction, fingerprint(text)))
+            if expires is not None and expires > now:
+                return True
+        return False
+
+    def is_minecraft_echo(self, author: str, content: str, now: float = None) -> bool:
+        # Eingehender MC-Chat: eigenes "say" (auch zusammengefasst) oder zurückgespiegelter Discord-Post?
+        if not content:
+            return False
+        now = now if now is not None else time.monotonic()
+        self._expire(now)
+        if not self._expires:
+            return False
+        said = [content, _TAG_RE.sub("", content, count=1)]
+        if author:
+            said.append(f"{author}: {content}")
+        echo = self._seen(TO_MINECRAFT, said, now)
+        if not echo and MERGED_SEPARATOR in content:
+            parts = content.split(MERGED_SEPARATOR)
+            echo = all(self._seen(TO_MINECRAFT, [part, _TAG_RE.sub("", part, count=1)], now) for part in parts)
+        if not echo:
+            posted = [content, _TAG_RE.sub("", content, count=1), _BRIDGE_PREFIX_RE.sub("", content, count=1)]
+            echo = self._seen(TO_DISCORD, posted, now)
+        if echo:
+            self.counters["suppressed_minecraft"] += 1
+        return echo
+
+    def is_discord_echo(self, content: str, now: float = None) -> bool:
+        # Eingehender Discord-Chat (Bots/Webhooks sind schon gefiltert), z. B. von einer fremden Bridge
+        if not content:
+            return False
+        now = now if now is not None else time.monotonic()
+        self._expire(now)
+        if not self._expires:
+            return False
+        stripped = _BRIDGE_PREFIX_RE.sub("", content, count=1)
+        echo = self._seen(TO_DISCORD, [content, stripped], now) or self._seen(TO_MINECRAFT, [content, stripped], now)
+        if echo:
+            self.counters["suppressed_discord"] += 1
+        return echo
+
+    def status(self) -> dict:
+        return dict(self.counters, tracked=len(self._expires))
@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import time
+
+import discord
+
+# Bulk-Delete akzeptiert nur Nachrichten jünger als 14 Tage
+BULK_DELETE_MAX_AGE_SECONDS = 14 * 24 * 3600 - 3600
+PERSIST_DEBOUNCE_SECONDS = 5.0
+
+
+class EphemeralMessages:
+    # Lebenszyklus kurzlebiger Bot-Nachrichten: Ablauf per TTL oder "ersetzt die vorige
+    # Nachricht derselben Art". Gelöscht wird direkt per ID (ohne fetch), gebündelt je Channel,
+    # von einem einzigen Timer für alle Commands. Persistiert wird nur eine kompakte ID-Liste.
+
+    def __init__(self, logger, persist=None, entries=None):
+        self._logger = logger
+        self._persist = persist  # blockierend, bekommt [[channel_id, message_id, kind, deadline], ...]
+        self._entries = {}  # message_id → [channel_id, message_id, kind, deadline]
+        self._timer = []  # Heap aus (deadline, message_id); veraltete Einträge werden übersprungen
+        self._wakeup = asyncio.Event()
+        self._dirty = False
+        self.counters = {"deleted": 0, "failed": 0}
+        for entry in entries or []:
+            try:
+                channel_id, message_id, kind, deadline = entry
+                self._add(int(channel_id), int(message_id), kind, deadline)
+            except Exception:
+                continue
+
+    def _add(self, channel_id: int, message_id: int, kind, deadline) -> None:
+        self._entries[message_id] = [channel_id, message_id, kind, deadline]
+        if deadline is not None:
+            heapq.heappush(self._timer, (deadline, message_id))
+
+    def _changed(self) -> None:
+        self._dirty = True
+        self._wakeup.set()
+
+    def track(self, channel_id: int, message_id: int, kind: str = None, ttl: float = None) -> None:
+        # kind: vorige Nachricht derselben Art wird sofort gelöscht; ttl: Löschen nach Sekunden
+        if kind:
+            self.expire(kind)
+        self._add(channel_id, message_id, kind, time.time() + ttl if ttl else None)
+        self._changed()
+
+    def expire(self, *kinds) -> None:
+        now = time.time()
+        for entry in self._entries.values():
+            if entry[2] in kinds and (entry[3] is None or entry[3] > now):
+                entry[3] = now
+                heapq.heappush(self._timer, (now, entry[1]))
+        self._changed()
+
+    def snapshot(self) -> list:
+        return [list(entry) for entry in self._entries.values()]
+
+    def _due(self, now: float) -> list:
+        due = []
+        while self._timer and self._timer[0][0] <= now:
+            deadline, message_id = heapq.heappop(self._timer)
+            entry = self._entries.get(message_id)
+            if entry is not None and entry[3] == deadline:
+                due.append(self._entries.pop(message_id))
+        return due
+
+    async def _delete_in_channel(self, bot, channel_id: int, message_ids: list) -> None:
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await bot.fetch_channel(channel_id)
+            except Exception:
+                self.counters["failed"] += len(message_ids)
+                return
+        cutoff = time.time() - BULK_DELETE_MAX_AGE_SECONDS
+        bulk = [mid for mid in message_ids if discord.utils.snowflake_time(mid).timestamp() > cutoff]
+        single = [mid for mid in message_ids if mid not in bulk]
+        if len(bulk) >= 2:
+            try:
+                await channel.delete_messages([discord.Object(id=mid) for mid in bulk])
+                self.counters["deleted"] += len(bulk)
+                bulk = []
+            except discord.HTTPException:
+                # z. B. fehlende "Nachrichten verwalten"-Berechtigung → einzeln löschen
+                pass
+        results = await asyncio.gather(
+            *(channel.get_partial_message(mid).delete() for mid in single + bulk),
+            return_exceptions=True,
+        )
+        for result in results:
+            if result is None or isinstance(result, discord.NotFound):
+                self.counters["deleted"] += 1
+            else:
+                self.counters["failed"] += 1
+
+    async def serve(self, bot, heartbeat=None) -> None:
+        await bot.wait_until_ready()
+        last_persist = 0.0
+        while True:
+            if heartbeat:
+                heartbeat()
+            self._wakeup.clear()
+            due = self._due(time.time())
+            if due:
+                by_channel = {}
+                for channel_id, message_id, _, _ in due:
+                    by_channel.setdefault(channel_id, []).append(message_id)
+                await asyncio.gather(*(self._delete_in_channel(bot, cid, mids) for cid, mids in by_channel.items()))
+                self._dirty = True
+            wait = 300.0
+            if self._timer:
+                wait = min(wait, max(self._timer[0][0] - time.time(), 0.0))
+            if self._dirty and self._persist is not None:
+                # Gebündelt speichern statt einmal pro Nachricht
+                since = time.monotonic() - last_persist
+                if since >= PERSIST_DEBOUNCE_SECONDS:
+                    self._dirty = False
+                    last_persist = time.monotonic()
+                    try:
+                        await asyncio.to_thread(self._persist, self.snapshot())
+                    except Exception as exc:
+                        self._dirty = True
+                        self._logger.warning("Ephemeral-Liste konnte nicht gespeichert werden: %s", exc)
+                else:
+                    wait = min(wait, PERSIST_DEBOUNCE_SECONDS - since)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
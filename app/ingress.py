@@ -0,0 +1,327 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import sys
+import zlib
+
+from aiohttp import web
+
+MC_EVENT_KEYS = ("event", "author", "content", "player")
+MAX_BATCH_EVENTS = 1000
+# Entpackt höchstens so viel wie aiohttp ohnehin annimmt (client_max_size)
+MAX_BATCH_BYTES = 1024 * 1024
+
+
+def verify_github_signature(secret: str, body: bytes, signature: str) -> bool:
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature or "", expected)
+
+
+def verify_mc_signature(secret: str, body: bytes, signature: str) -> bool:
+    expected = "sha256=" + hashlib.sha256(secret.encode("utf-8") + body).hexdigest()
+    return hmac.compare_digest(signature or "", expected)
+
+
+def compact_github_event(event: str, payload: dict) -> dict:
+    # Nur die Felder, die der Bot tatsächlich postet (Push-Payloads sind oft mehrere 100 KB)
+    data = {"source": "github", "event": event, "repo": (payload.get("repository") or {}).get("full_name")}
+    if event == "push":
+        commits = payload.get("commits") or []
+        if not commits and payload.get("head_commit"):
+            commits = [payload.get("head_commit")]
+        data["commits"] = [
+            {"author": ((c.get("author") or {}).get("name")) or "?", "message": c.get("message") or "", "url": c.get("url") or ""}
+            for c in commits
+        ]
+    elif event == "pull_request":
+        pr = payload.get("pull_request") or {}
+        data["action"] = payload.get("action", "")
+        data["pr"] = {
+            "number": pr.get("number", "?"),
+            "title": pr.get("title", "Unbekannt"),
+            "html_url": pr.get("html_url", ""),
+            "user": (pr.get("user") or {}).get("login", "?"),
+            "merged": pr.get("merged", False),
+            "merged_by": (pr.get("merged_by") or {}).get("login", "?"),
+        }
+        data["requested_reviewer"] = (payload.get("requested_reviewer") or {}).get("login", "?")
+    return data
+
+
+def compact_mc_event(payload: dict) -> dict:
+    data = {key: payload[key] for key in MC_EVENT_KEYS if key in payload}
+    data["source"] = "mc"
+    return data
+
+
+def status_response(status: str) -> web.Response:
+    return web.Response(status=200 if status in ("ok", "ignored") else 202, text=status)
+
+
+async def parse_github_request(request: web.Request, secret: str):
+    # → (kompaktes Event, None) oder (None, Fehler-Response)
+    body = await request.read()
+    if not verify_github_signature(secret, body, request.headers.get("X-Hub-Signature-256", "")):
+        return None, web.Response(status=401, text="invalid signature")
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except Exception:
+        return None, web.Response(status=400, text="invalid json")
+    return compact_github_event(request.headers.get("X-GitHub-Event", ""), payload), None
+
+
+async def parse_mc_request(request: web.Request, secret: str):
+    if not secret:
+        return None, web.Response(status=404)
+    body = await request.read()
+    if not verify_mc_signature(secret, body, request.headers.get("X-MC-Signature", "")):
+        return None, web.Response(status=401, text="invalid signature")
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except Exception:
+        return None, web.Response(status=400, text="invalid json")
+    return compact_mc_event(payload), None
+
+
+def decode_batch_body(body: bytes) -> bytes:
+    # aiohttp entpackt bei "Content-Encoding: gzip" selbst; sonst gzip anhand der Magic-Bytes erkennen
+    if body[:2] != b"\x1f\x8b":
+        return body
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = inflater.decompress(body, MAX_BATCH_BYTES + 1)
+    if len(data) > MAX_BATCH_BYTES or inflater.unconsumed_tail:
+        raise ValueError("batch too large")
+    return data
+
+
+def parse_ndjson_events(data: bytes) -> list:
+    # Eine JSON-Zeile pro Event; ungültige Zeilen bleiben als None stehen (eigenes Ergebnis)
+    events = []
+    for line in data.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            events.append(None)
+            continue
+        events.append(compact_mc_event(payload) if isinstance(payload, dict) else None)
+    return events
+
+
+async def parse_mc_batch_request(request: web.Request, secret: str):
+    # Signatur wie bei /mc, aber über das unkomprimierte NDJSON (unabhängig von der Transportkompression)
+    if not secret:
+        return None, web.Response(status=404)
+    try:
+        data = decode_batch_body(await request.read())
+    except ValueError:
+        return None, web.Response(status=413, text="batch too large")
+    except zlib.error:
+        return None, web.Response(status=400, text="invalid gzip")
+    if not verify_mc_signature(secret, data, request.headers.get("X-MC-Signature", "")):
+        return None, web.Response(status=401, text="invalid signature")
+    events = parse_ndjson_events(data)
+    if len(events) > MAX_BATCH_EVENTS:
+        return None, web.Response(status=413, text="too many events")
+    return events, None
+
+
+def batch_response(statuses) -> web.Response:
+    # Ergebnis je Event in Eingangsreihenfolge
+    return web.json_response({"results": statuses})
+
+
+# --- Bot-Seite: nimmt validierte Events der Worker per Unix-Socket entgegen ---
+
+async def ingress_listener_task(bot, logger, cfg, handlers):
+    # handlers: source → Coroutine-Funktion(event) → Status-Text; Protokoll: NDJSON {"id", "event"} → {"id", "status"}
+    path = cfg["INGRESS_SOCKET_PATH"]
+
+    async def handle_connection(reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def process(line):
+            message = {}
+            try:
+                message = json.loads(line)
+                event = message["event"]
+                handler = handlers.get(event.get("source"))
+                status = await handler(event) if handler else "unknown source"
+            except Exception as exc:
+                logger.warning("Ingress-Event konnte nicht verarbeitet werden: %s", exc)
+                message = message if isinstance(message, dict) else {}
+                status = "error"
+            reply = {"id": message.get("id"), "status": status}
+            try:
+                async with write_lock:
+                    writer.write(json.dumps(reply, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+                    await writer.drain()
+            except ConnectionError:
+                pass
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Ein Task pro Anfrage: langsame Handler (GitHub, Batches) halten die übrigen
+                # nicht auf; der Worker ordnet die Antworten über die ID zu
+                task = asyncio.ensure_future(process(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    server = await asyncio.start_unix_server(handle_connection, path=path)
+    logger.info("Ingress-Listener auf %s", path)
+    try:
+        while not bot.is_closed():
+            beat = cfg.get("HEARTBEAT")
+            if beat:
+                beat()
+            await asyncio.sleep(60)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def ingress_workers_task(bot, logger, cfg):
+    # Startet die Worker-Prozesse und beendet sie mit dem Job; stirbt einer, startet der Supervisor alle neu
+    env = dict(os.environ, INGRESS_SOCKET_PATH=cfg["INGRESS_SOCKET_PATH"])
+    procs = []
+    try:
+        for _ in range(cfg["INGRESS_WORKERS"]):
+            procs.append(await asyncio.create_subprocess_exec(sys.executable, "-m", "app.ingress", env=env))
+        logger.info("%d Ingress-Worker gestartet", len(procs))
+        waiters = [asyncio.ensure_future(proc.wait()) for proc in procs]
+        while not bot.is_closed():
+            beat = cfg.get("HEARTBEAT")
+            if beat:
+                beat()
+            done, _ = await asyncio.wait(waiters, timeout=60, return_when=asyncio.FIRST_COMPLETED)
+            if done:
+                raise RuntimeError("Ingress-Worker beendet (Exit-Code %s)" % next(iter(done)).result())
+    finally:
+        for proc in procs:
+            if proc.returncode is None:
+                proc.terminate()
+        for proc in procs:
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+
+
+# --- Worker-Prozess: HTTP annehmen, prüfen, kompakt an den Bot weiterreichen ---
+
+class _BotLink:
+    # Eine persistente Socket-Verbindung pro Worker; Antworten werden über die Request-ID zugeordnet
+
+    def __init__(self, path: str):
+        self._path = path
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        reader, self._writer = await asyncio.open_unix_connection(self._path)
+        asyncio.ensure_future(self._read_replies(reader, self._writer))
+
+    async def _read_replies(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply.get("status"))
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Bot-Verbindung getrennt"))
+            self._pending.clear()
+
+    async def forward(self, event: dict, timeout: float = 30.0):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        async with self._lock:
+            if self._writer is None:
+                await self._connect()
+            self._pending[request_id] = future
+            line = json.dumps({"id": request_id, "event": event}, ensure_ascii=False, separators=(",", ":"))
+            self._writer.write(line.encode("utf-8") + b"\n")
+            await self._writer.drain()
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+
+async def _run_worker():
+    github_secret = os.getenv("GITHUB_WEBHOOK_SECRET") or ""
+    mc_secret = os.getenv("MC_WEBHOOK_SECRET") or ""
+    link = _BotLink(os.getenv("INGRESS_SOCKET_PATH", "ingress.sock"))
+
+    async def forward(event):
+        try:
+            return status_response(await link.forward(event))
+        except Exception:
+            return web.Response(status=503, text="bot unavailable")
+
+    async def handle_health(request: web.Request):
+        try:
+            return web.json_response(json.loads(await link.forward({"source": "health"}, timeout=5)))
+        except Exception:
+            return web.Response(status=503, text="bot unavailable")
+
+    async def handle_github(request: web.Request):
+        event, error = await parse_github_request(request, github_secret)
+        return error or await forward(event)
+
+    async def handle_mc(request: web.Request):
+        event, error = await parse_mc_request(request, mc_secret)
+        return error or await forward(event)
+
+    async def handle_mc_batch(request: web.Request):
+        events, error = await parse_mc_batch_request(request, mc_secret)
+        if error is not None:
+            return error
+        try:
+            return batch_response(json.loads(await link.forward({"source": "mc_batch", "events": events})))
+        except Exception:
+            return web.Response(status=503, text="bot unavailable")
+
+    app = web.Application()
+    app.add_routes([web.get("/healthz", handle_health), web.post("/github", handle_github), web.post("/mc", handle_mc), web.post("/mc/batch", handle_mc_batch)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    # SO_REUSEPORT: alle Worker binden denselben Port, der Kernel verteilt die Verbindungen
+    site = web.TCPSite(runner, "0.0.0.0", int(os.getenv("PORT") or 8080), reuse_port=True)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_worker())
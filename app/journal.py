@@ -0,0 +1,150 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+DIRECTION_DISCORD = "discord"      # MC → Discord
+DIRECTION_MINECRAFT = "minecraft"  # Discord → MC
+
+_SCHEMA = """
+create table if not exists outbox (
+    id integer primary key autoincrement,
+    direction text not null,
+    payload text not null,
+    created real not null,
+    attempts integer not null default 0
+);
+create index if not exists outbox_direction_id on outbox (direction, id);
+"""
+
+
+class DeliveryRejected(Exception):
+    # Ziel hat die Nachricht endgültig abgelehnt (z. B. HTTP 400) → nicht erneut versuchen
+    pass
+
+
+class BridgeJournal:
+    # Append-only Outbox (SQLite, WAL) für beide Brückenrichtungen. Nachrichten werden
+    # zuerst journaliert und dann je Richtung in Reihenfolge zugestellt; nicht zustellbare
+    # Einträge bleiben liegen und werden nach Rückkehr des Ziels nachgeliefert.
+
+    def __init__(self, path: str, logger, retention_hours: int = 24, max_pending: int = 10000):
+        self._logger = logger
+        self._retention_seconds = retention_hours * 3600
+        self._max_pending = max_pending
+        # isolation_level=None: jedes INSERT ist ein eigener, kurzer Commit
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("pragma journal_mode=wal")
+        # WAL + NORMAL: kein fsync pro Commit, sondern gebündelt beim Checkpoint
+        self._db.execute("pragma synchronous=normal")
+        self._db.executescript(_SCHEMA)
+        # DB-Zugriffe laufen im Thread (kein Disk-I/O im Event-Loop); eine Verbindung → ein Lock
+        self._db_lock = threading.Lock()
+        # Appends in Aufrufreihenfolge einfügen, auch wenn die Threads anders drankämen
+        self._append_lock = asyncio.Lock()
+        self._wakeups = {DIRECTION_DISCORD: asyncio.Event(), DIRECTION_MINECRAFT: asyncio.Event()}
+        # Ausstehende Einträge je Richtung im Speicher, damit /healthz keine DB-Abfrage braucht
+        self._pending = {direction: 0 for direction in self._wakeups}
+        for direction, count in self._db.execute("select direction, count(*) from outbox group by direction"):
+            self._pending[direction] = count
+        self.counters = {"appended": 0, "delivered": 0, "retries": 0, "expired": 0, "rejected": 0}
+
+    def _execute(self, sql: str, params=()):
+        with self._db_lock:
+            return self._db.execute(sql, params)
+
+    def _insert(self, direction: str, payload: str) -> int:
+        return self._execute(
+            "insert into outbox (direction, payload, created) values (?, ?, ?)",
+            (direction, payload, time.time()),
+        ).lastrowid
+
+    async def append(self, direction: str, payload: dict) -> int:
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        async with self._append_lock:
+            row_id = await asyncio.to_thread(self._insert, direction, data)
+        self.counters["appended"] += 1
+        self._pending[direction] += 1
+        self._wakeups[direction].set()
+        return row_id
+
+    def pending(self) -> dict:
+        return {direction: count for direction, count in self._pending.items() if count}
+
+    def _next_batch(self, direction: str, limit: int = 50):
+        with self._db_lock:
+            return self._db.execute(
+                "select id, payload, attempts from outbox where direction = ? order by id limit ?",
+                (direction, limit),
+            ).fetchall()
+
+    async def _delete(self, direction: str, row_id: int) -> None:
+        cur = await asyncio.to_thread(self._execute, "delete from outbox where id = ?", (row_id,))
+        # Zähler nur anpassen, wenn die Zeile noch da war
+        if cur.rowcount > 0:
+            self._pending[direction] -= 1
+
+    def _prune(self, direction: str) -> int:
+        # Nur die eigene Richtung: deren serve-Task hält gerade keinen Batch
+        cutoff = time.time() - self._retention_seconds
+        expired = self._execute(
+            "delete from outbox where direction = ? and created < ?", (direction, cutoff)
+        ).rowcount
+        expired += self._execute(
+            "delete from outbox where direction = ? and id not in "
+            "(select id from outbox where direction = ? order by id desc limit ?)",
+            (direction, direction, self._max_pending),
+        ).rowcount
+        return expired
+
+    async def serve(self, direction: str, deliver, heartbeat=None, max_backoff: float = 60.0) -> None:
+        # deliver: Coroutine-Funktion(payload), wirft bei Fehler
+        wakeup = self._wakeups[direction]
+        backoff = 1.0
+        last_prune = 0.0
+        while True:
+            if heartbeat:
+                heartbeat()
+            if time.monotonic() - last_prune > 300:
+                expired = await asyncio.to_thread(self._prune, direction)
+                last_prune = time.monotonic()
+                if expired:
+                    self._pending[direction] -= expired
+                    self.counters["expired"] += expired
+                    self._logger.warning("Journal %s: %d nicht zustellbare Nachrichten verworfen", direction, expired)
+            wakeup.clear()
+            batch = await asyncio.to_thread(self._next_batch, direction)
+            if not batch:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=300)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for row_id, payload, attempts in batch:
+                try:
+                    await deliver(json.loads(payload))
+                except DeliveryRejected as exc:
+                    self.counters["rejected"] += 1
+                    self._logger.warning("Journal %s: Nachricht abgelehnt und verworfen (%s)", direction, exc)
+                    await self._delete(direction, row_id)
+                    continue
+                except Exception as exc:
+                    self.counters["retries"] += 1
+                    await asyncio.to_thread(self._execute, "update outbox set attempts = attempts + 1 where id = ?", (row_id,))
+                    if attempts == 0:
+                        self._logger.warning("Journal %s: Zustellung fehlgeschlagen (%s), wird wiederholt", direction, exc)
+                    # Reihenfolge wahren: nicht am fehlerhaften Eintrag vorbei zustellen
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, max_backoff)
+                    break
+                await self._delete(direction, row_id)
+                self.counters["delivered"] += 1
+                backoff = 1.0
+
+    def close(self) -> None:
+        try:
+            with self._db_lock:
+                self._db.close()
+        except Exception:
+            pass
@@ -0,0 +1,80 @@
+import asyncio
+
+
+class LiveConfig:
+    # Laufzeit-Konfiguration, die laufende Tasks abonnieren. Änderungen wecken
+    # betroffene Tasks sofort aus ihrem Sleep, statt auf das nächste Intervall zu warten.
+
+    def __init__(self, values: dict = None):
+        self._values = dict(values or {})
+        self._views = []
+        self._subscribers = []
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+    def publish(self, values: dict) -> set:
+        changed = {key for key, value in values.items() if self._values.get(key, object()) != value}
+        self._values.update(values)
+        if not changed:
+            return changed
+        for view in list(self._views):
+            view._notify(changed)
+        for callback in list(self._subscribers):
+            callback(changed)
+        return changed
+
+    def subscribe(self, callback) -> None:
+        self._subscribers.append(callback)
+
+    def view(self, keys=None, extras: dict = None) -> "ConfigView":
+        view = ConfigView(self, keys, extras)
+        self._views.append(view)
+        return view
+
+    def release(self, view: "ConfigView") -> None:
+        try:
+            self._views.remove(view)
+        except ValueError:
+            pass
+
+
+class ConfigView:
+    # Dict-ähnliche Sicht für einen Task; sleep() endet vorzeitig, wenn sich
+    # einer der beobachteten Schlüssel ändert.
+
+    def __init__(self, live: LiveConfig, keys=None, extras: dict = None):
+        self._live = live
+        self._keys = frozenset(keys) if keys else None
+        self._extras = dict(extras or {})
+        self._changed = asyncio.Event()
+
+    def __getitem__(self, key):
+        if key in self._extras:
+            return self._extras[key]
+        return self._live[key]
+
+    def get(self, key, default=None):
+        if key in self._extras:
+            return self._extras[key]
+        return self._live.get(key, default)
+
+    def _notify(self, changed: set) -> None:
+        if self._keys is None or self._keys & changed:
+            self._changed.set()
+
+    async def sleep(self, seconds: float) -> bool:
+        # True, wenn der Sleep durch eine Konfig-Änderung beendet wurde
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=max(seconds, 0))
+            woke = True
+        except asyncio.TimeoutError:
+            woke = False
+        self._changed.clear()
+        return woke
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import re
+from typing import Optional
+
+# Vanilla/Forge: "[12:34:56] [Server thread/INFO]: ..." (Forge mit zusätzlichem "[logger/]")
+# Paper/Spigot:  "[12:34:56 INFO]: ..."
+LINE_RE = re.compile(r"^\[[^\]]*?(?: INFO\]|\] \[[^\]]+/INFO\](?: \[[^\]]*\])?): (?P<msg>.*)$")
+CHAT_RE = re.compile(r"^(?:\[Not Secure\] )?<(?P<author>[^>]{1,64})> (?P<content>.*)$")
+JOIN_RE = re.compile(r"^(?P<player>[A-Za-z0-9_]{1,16}) joined the game$")
+LEAVE_RE = re.compile(r"^(?P<player>[A-Za-z0-9_]{1,16}) left the game$")
+DEATH_RE = re.compile(
+    # "was " nur mit Vanilla-Todesverben, sonst zählt z. B. "Steve was kicked …" als Tod
+    r"^(?P<player>[A-Za-z0-9_]{1,16}) (?:was (?:slain|shot|killed|blown up|fireballed|pummeled|impaled|stung|squished"
+    r"|squashed|skewered|obliterated|doomed to fall|burnt|roasted|frozen|struck by lightning|pricked|poked)|died|drowned|blew up|burned to death|fell |hit the ground"
+    r"|tried to swim|starved|suffocated|froze|withered|experienced kinetic|discovered the floor"
+    r"|walked into|went up in flames|went off with a bang|didn't want to live|left the confines|got finished off)"
+)
+# Whitelist-Änderungen über Konsole/Ingame, z. B. "Added Steve to the whitelist" oder "[Admin: Added Steve to the whitelist]"
+WHITELIST_ADD_RE = re.compile(r"^\[?(?:[A-Za-z0-9_]+: )?Added (?P<player>[A-Za-z0-9_]{1,16}) to the whitelist\]?$")
+WHITELIST_REMOVE_RE = re.compile(r"^\[?(?:[A-Za-z0-9_]+: )?Removed (?P<player>[A-Za-z0-9_]{1,16}) from the whitelist\]?$")
+
+READ_CHUNK_BYTES = 256 * 1024
+
+
+def parse_log_line(line: str) -> Optional[dict]:
+    # Liefert ein Event im selben Format wie der /mc-Webhook oder None
+    match = LINE_RE.match(line)
+    if not match:
+        return None
+    msg = match.group("msg").strip()
+    chat = CHAT_RE.match(msg)
+    if chat:
+        return {"event": "chat", "author": chat.group("author"), "content": chat.group("content")}
+    join = JOIN_RE.match(msg)
+    if join:
+        return {"event": "join", "content": join.group("player")}
+    leave = LEAVE_RE.match(msg)
+    if leave:
+        return {"event": "leave", "content": leave.group("player")}
+    wl_add = WHITELIST_ADD_RE.match(msg)
+    if wl_add:
+        return {"event": "whitelist_added", "content": wl_add.group("player")}
+    wl_remove = WHITELIST_REMOVE_RE.match(msg)
+    if wl_remove:
+        return {"event": "whitelist_removed", "content": wl_remove.group("player")}
+    death = DEATH_RE.match(msg)
+    if death:
+        return {"event": "death", "player": death.group("player"), "content": msg}
+    return None
+
+
+def _load_offset(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+            if isinstance(data, dict) and "offset" in data:
+                return data
+    except Exception:
+        pass
+    return None
+
+
+def _save_offset(path: str, inode: int, offset: int) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"inode": inode, "offset": offset}, fh)
+    os.replace(tmp, path)
+
+
+def _read_chunk(fh, offset: int) -> bytes:
+    fh.seek(offset)
+    return fh.read(READ_CHUNK_BYTES)
+
+
+def _open_log(path: str):
+    fh = open(path, "rb")
+    return fh, os.fstat(fh.fileno()).st_ino
+
+
+async def _handle_lines(data: bytes, logger, handle_event) -> None:
+    for raw in data.splitlines():
+        payload = parse_log_line(raw.decode("utf-8", errors="replace"))
+        if payload is None:
+            continue
+        try:
+            await handle_event(payload)
+        except Exception as exc:
+            logger.warning("Log-Event konnte nicht verarbeitet werden: %s", exc)
+
+
+async def _drain(fh, offset: int, logger, handle_event) -> None:
+    # Alte Datei nach Rotation bis EOF lesen: Zeilen seit dem letzten Poll (z. B. kurz vor
+    # einem Neustart) gingen sonst verloren. Der Server schreibt nicht mehr hinein,
+    # daher zählt auch eine unvollständige letzte Zeile.
+    while True:
+        try:
+            chunk = await asyncio.to_thread(_read_chunk, fh, offset)
+        except Exception as exc:
+            logger.warning("Rotiertes Server-Log konnte nicht gelesen werden: %s", exc)
+            return
+        if not chunk:
+            return
+        await _handle_lines(chunk, logger, handle_event)
+        offset += len(chunk)
+
+
+async def log_tail_task(bot, logger, cfg, handle_event):
+    log_path = cfg["MC_LOG_PATH"]
+    offset_path = cfg["MC_LOG_OFFSET_PATH"]
+    poll_seconds = cfg["MC_LOG_POLL_SECONDS"]
+    state = _load_offset(offset_path)
+    inode = state.get("inode") if state else None
+    offset = state.get("offset", 0) if state else None
+    # Offenes Handle auf die aktuelle Datei, damit sie nach einer Rotation noch lesbar bleibt
+    fh = None
+    await bot.wait_until_ready()
+    try:
+        while not bot.is_closed():
+            beat = cfg.get("HEARTBEAT")
+            if beat:
+                beat()
+            try:
+                st = os.stat(log_path)
+            except FileNotFoundError:
+                st = None
+            if fh is not None and (st is None or st.st_ino != inode):
+                # Log rotiert (umbenannt/gepackt) → Rest der alten Datei lesen, dann neue von vorn
+                await _drain(fh, offset, logger, handle_event)
+                fh.close()
+                fh = None
+                logger.info("Server-Log rotiert, lese %s von Beginn", log_path)
+                inode, offset = (st.st_ino if st else None), 0
+            if st is None:
+                await asyncio.sleep(poll_seconds)
+                continue
+            if offset is None:
+                # Erststart: alte Historie nicht erneut posten
+                inode, offset = st.st_ino, st.st_size
+                await asyncio.to_thread(_save_offset, offset_path, inode, offset)
+            elif st.st_ino != inode or st.st_size < offset:
+                # Neue Datei seit dem letzten Lauf oder gekürzt → von vorn lesen
+                logger.info("Server-Log rotiert, lese %s von Beginn", log_path)
+                inode, offset = st.st_ino, 0
+            if fh is None:
+                try:
+                    fh, opened_inode = await asyncio.to_thread(_open_log, log_path)
+                except Exception as exc:
+                    logger.warning("Server-Log konnte nicht geöffnet werden: %s", exc)
+                    await asyncio.sleep(poll_seconds)
+                    continue
+                if opened_inode != inode:
+                    # Zwischen stat und open rotiert
+                    inode, offset = opened_inode, 0
+            if st.st_size == offset:
+                await asyncio.sleep(poll_seconds)
+                continue
+            try:
+                chunk = await asyncio.to_thread(_read_chunk, fh, offset)
+            except Exception as exc:
+                logger.warning("Server-Log konnte nicht gelesen werden: %s", exc)
+                fh.close()
+                fh = None
+                await asyncio.sleep(poll_seconds)
+                continue
+            # Nur vollständige Zeilen verarbeiten; Rest beim nächsten Durchlauf
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                if len(chunk) < READ_CHUNK_BYTES:
+                    await asyncio.sleep(poll_seconds)
+                    continue
+                end = len(chunk) - 1
+            consumed = chunk[:end + 1]
+            await _handle_lines(consumed, logger, handle_event)
+            offset += len(consumed)
+            try:
+                await asyncio.to_thread(_save_offset, offset_path, inode, offset)
+            except Exception as exc:
+                logger.warning("Log-Offset konnte nicht gespeichert werden: %s", exc)
+            if len(chunk) < READ_CHUNK_BYTES:
+                await asyncio.sleep(poll_seconds)
+    finally:
+        if fh is not None:
+            fh.close()
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import secrets
+from collections import OrderedDict
+
+from aiohttp import WSMsgType, web
+
+from app.ingress import compact_mc_event, verify_mc_signature
+
+AUTH_TIMEOUT_SECONDS = 10
+# Antwortet die Mod so lange nicht, gilt die Verbindung als tot (→ Resume bzw. Fallback)
+ACK_TIMEOUT_SECONDS = 10
+# Unbestätigte Chatzeilen; darüber lehnt send_chat ab und der Aufrufer versucht es später erneut
+OUTBOX_LIMIT = 1000
+CLOSE_AUTH_FAILED = 4001
+CLOSE_REPLACED = 4002
+CLOSE_ACK_TIMEOUT = 4003
+
+
+class ModLink:
+    # Persistente WebSocket-Verbindung zur Server-Mod (/mc/ws). Mod→Bot: Bridge-Events, Bot→Mod:
+    # Chatzeilen, beides mit Sequenznummern und (kumulativen) Acks. Nach einem Reconnect setzen
+    # beide Seiten an der letzten bestätigten Nummer fort; was nicht innerhalb von resume_seconds
+    # wieder verbunden wird, geht über den Fallback (RCON) raus.
+    #
+    # Protokoll (JSON-Textframes):
+    #   Bot:  {"type": "challenge", "nonce"}
+    #   Mod:  {"type": "auth", "signature": "sha256=" + sha256(secret + nonce), "session"?, "last_seq"?}
+    #   Bot:  {"type": "welcome", "session", "last_ack"}   → Mod sendet Events mit seq > last_ack erneut
+    #   Mod:  {"type": "event", "seq", "event", "author", "content", "player"} → Bot: {"type": "ack", "seq", "status"}
+    #   Bot:  {"type": "chat", "seq", "text"}                                   → Mod: {"type": "ack", "seq"}
+
+    def __init__(self, secret: str, logger, handle_event, fallback, resume_seconds: int = 60):
+        self._secret = secret
+        self._logger = logger
+        self._handle_event = handle_event  # Coroutine-Funktion(kompaktes Event) → Status
+        self._fallback = fallback  # Coroutine-Funktion(text), z. B. RCON say
+        self._resume_seconds = resume_seconds
+        self.session = secrets.token_hex(8)
+        self._ws = None
+        self._in_seq = 0  # zuletzt verarbeitetes Mod-Event
+        self._out_seq = 0
+        self._outbox = OrderedDict()  # seq → (Text, Future), bis die Mod bestätigt oder der Fallback zustellt
+        self._fallback_task = None
+        self._flushing = False
+        self.counters = {"connects": 0, "events": 0, "duplicates": 0, "sent": 0, "resent": 0, "fallback": 0}
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    def status(self) -> dict:
+        return dict(self.counters, connected=self.connected, unacked=len(self._outbox))
+
+    async def send_chat(self, text: str) -> bool:
+        # True erst, wenn die Mod bestätigt hat oder der Fallback die Zeile zugestellt hat –
+        # so löscht das Journal nichts, was bei einem Neustart noch verloren gehen könnte.
+        # False: keine Verbindung und kein Resume offen → der Aufrufer sendet selbst per RCON.
+        ws = self._ws if self.connected else None
+        if ws is None and self._fallback_task is None:
+            return False
+        if len(self._outbox) >= OUTBOX_LIMIT:
+            raise RuntimeError("Mod-Link-Rückstau")
+        # Während des Resume-Fensters kommen neue Zeilen hinter die alten in die Outbox,
+        # damit sie nicht vor älteren unbestätigten Zeilen per RCON im Spiel landen
+        self._out_seq += 1
+        seq = self._out_seq
+        future = asyncio.get_running_loop().create_future()
+        self._outbox[seq] = (text, future)
+        self.counters["sent"] += 1
+        if ws is not None:
+            try:
+                await ws.send_json({"type": "chat", "seq": seq, "text": text})
+            except Exception:
+                pass  # bleibt in der Outbox; Resume bzw. Fallback übernimmt
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout=ACK_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                if self._ws is ws:
+                    self._logger.warning("Mod-Link: kein Ack für %s, Verbindung wird getrennt", seq)
+                    await ws.close(code=CLOSE_ACK_TIMEOUT, message=b"ack timeout")
+        return await future
+
+    def _acked(self, seq) -> None:
+        if not isinstance(seq, int):
+            return
+        while self._outbox:
+            first = next(iter(self._outbox))
+            if first > seq:
+                break
+            _, future = self._outbox.pop(first)
+            if not future.done():
+                future.set_result(True)
+
+    async def _authenticate(self, ws):
+        nonce = secrets.token_hex(16)
+        await ws.send_json({"type": "challenge", "nonce": nonce})
+        try:
+            hello = await ws.receive_json(timeout=AUTH_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, TypeError, ValueError):
+            return None
+        if not isinstance(hello, dict) or hello.get("type") != "auth":
+            return None
+        if not verify_mc_signature(self._secret, nonce.encode("utf-8"), hello.get("signature", "")):
+            return None
+        return hello
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        hello = await self._authenticate(ws)
+        if hello is None:
+            await ws.close(code=CLOSE_AUTH_FAILED, message=b"auth failed")
+            return ws
+        if hello.get("session") != self.session:
+            # Neue Mod-Sitzung (Server-/Bot-Neustart): Mod-Sequenzen beginnen von vorn
+            self._in_seq = 0
+        if self._fallback_task is not None:
+            if self._flushing:
+                # Fallback liefert schon aus → erst abschließen, sonst kämen Zeilen doppelt an
+                await self._fallback_task
+            else:
+                self._fallback_task.cancel()
+            self._fallback_task = None
+        previous, self._ws = self._ws, ws
+        if previous is not None and not previous.closed:
+            await previous.close(code=CLOSE_REPLACED, message=b"replaced")
+        self.counters["connects"] += 1
+        self._logger.info("Mod-Link verbunden (Session %s)", self.session)
+        try:
+            await ws.send_json({"type": "welcome", "session": self.session, "last_ack": self._in_seq})
+            last_seq = hello.get("last_seq")
+            self._acked(last_seq if isinstance(last_seq, int) else 0)
+            for seq, (text, _) in list(self._outbox.items()):
+                await ws.send_json({"type": "chat", "seq": seq, "text": text})
+                self.counters["resent"] += 1
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(message.data)
+                except ValueError:
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                if data.get("type") == "event":
+                    await self._on_event(ws, data)
+                elif data.get("type") == "ack":
+                    self._acked(data.get("seq"))
+        finally:
+            if self._ws is ws:
+                self._ws = None
+                self._logger.info("Mod-Link getrennt (%d unbestätigt)", len(self._outbox))
+                if self._outbox:
+                    self._fallback_task = asyncio.ensure_future(self._fallback_after_timeout())
+        return ws
+
+    async def _on_event(self, ws, data: dict) -> None:
+        seq = data.get("seq")
+        if not isinstance(seq, int):
+            await ws.send_json({"type": "ack", "seq": seq, "status": "invalid seq"})
+            return
+        if seq <= self._in_seq:
+            # Nach Resume erneut gesendet, aber schon verarbeitet
+            self.counters["duplicates"] += 1
+            status = "duplicate"
+        else:
+            try:
+                status = await self._handle_event(compact_mc_event(data))
+            except Exception as exc:
+                self._logger.warning("Mod-Link-Event %s fehlgeschlagen: %s", seq, exc)
+                status = "error"
+            self._in_seq = seq
+            self.counters["events"] += 1
+        await ws.send_json({"type": "ack", "seq": seq, "status": status})
+
+    async def _fallback_after_timeout(self) -> None:
+        await asyncio.sleep(self._resume_seconds)
+        if self.connected:
+            return
+        self._logger.warning("Mod-Link nicht wieder verbunden, %d Zeilen per Fallback", len(self._outbox))
+        self._flushing = True
+        try:
+            # Auch Zeilen, die während des Abarbeitens dazukommen, in Reihenfolge ausliefern
+            while self._outbox:
+                seq = next(iter(self._outbox))
+                text, future = self._outbox[seq]
+                try:
+                    await self._fallback(text)
+                except Exception as exc:
+                    self._logger.warning("Fallback-Zustellung fehlgeschlagen: %s", exc)
+                    # Rest bleibt beim Aufrufer (Journal) und wird dort in Reihenfolge wiederholt
+                    for _, pending in self._outbox.values():
+                        if not pending.done():
+                            pending.set_exception(exc)
+                    self._outbox.clear()
+                    return
+                del self._outbox[seq]
+                self.counters["fallback"] += 1
+                if not future.done():
+                    future.set_result(True)
+        finally:
+            self._flushing = False
+            if self._fallback_task is asyncio.current_task():
+                self._fallback_task = None
@@ -0,0 +1,116 @@
+import asyncio
+import re
+import time
+from typing import Optional
+
+# Antwort von RCON "list", z. B. "There are 2 of a max of 20 players online: Steve, Alex"
+RCON_LIST_RE = re.compile(r"There are (?P<num>\d+) (?:of a max of|/) ?(?P<max>\d+) players online:?\s*(?P<names>.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def parse_rcon_list(response: str):
+    match = RCON_LIST_RE.search(response or "")
+    if not match:
+        return None, None
+    names = [n.strip() for n in match.group("names").split(",") if n.strip()]
+    return names, int(match.group("max"))
+
+
+class PresenceTracker:
+    # Online-Spieler aus Bridge-Events (join/leave) mit Sessionstart; beendete Sessions
+    # gehen an on_session_end(name, sekunden) (Spielzeit-Statistik, app.stats)
+
+    def __init__(self, on_session_end=None, on_change=None):
+        self._online = {}  # name.lower() → [Anzeigename, Sessionstart (epoch)]
+        self._on_session_end = on_session_end
+        self._on_change = on_change  # ohne Argumente, bei geänderter Spielerliste/Erreichbarkeit
+        self.max_players = None
+        self.last_update = None
+        self.reachable = None
+
+    def is_known(self) -> bool:
+        return self.last_update is not None
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def join(self, name: str, now: Optional[float] = None) -> bool:
+        # True, wenn eine neue Session beginnt (doppelte Join-Events zählen nicht)
+        if not name:
+            return False
+        now = now if now is not None else time.time()
+        key = name.lower()
+        started = key not in self._online
+        if started:
+            self._online[key] = [name, now]
+        self.last_update = now
+        if started or self.reachable is not True:
+            self.reachable = True
+            self._changed()
+        return started
+
+    def leave(self, name: str, now: Optional[float] = None) -> int:
+        # Liefert die Dauer der beendeten Session in Sekunden
+        if not name:
+            return 0
+        now = now if now is not None else time.time()
+        self.last_update = now
+        entry = self._online.pop(name.lower(), None)
+        if entry is None:
+            return 0
+        seconds = max(int(now - entry[1]), 0)
+        if self._on_session_end is not None:
+            self._on_session_end(entry[0], seconds)
+        self._changed()
+        return seconds
+
+    def reconcile(self, names, max_players: Optional[int] = None, now: Optional[float] = None) -> None:
+        # Abgleich mit Query/RCON: verpasste Joins/Leaves reparieren
+        now = now if now is not None else time.time()
+        actual = {n.lower(): n for n in names if n}
+        for key in [k for k in self._online if k not in actual]:
+            self.leave(self._online[key][0], now)
+        joined = [key for key in actual if key not in self._online]
+        for key in joined:
+            self._online[key] = [actual[key], now]
+        changed = bool(joined) or self.reachable is not True
+        if max_players is not None and max_players != self.max_players:
+            self.max_players = max_players
+            changed = True
+        self.last_update = now
+        self.reachable = True
+        if changed:
+            self._changed()
+
+    def mark_unreachable(self, now: Optional[float] = None) -> None:
+        # Server nicht erreichbar: offene Sessions abschließen
+        now = now if now is not None else time.time()
+        for entry in list(self._online.values()):
+            self.leave(entry[0], now)
+        if self.reachable is not False:
+            self.reachable = False
+            self._changed()
+
+    def online(self) -> list:
+        return sorted((entry[0] for entry in self._online.values()), key=str.lower)
+
+    def sessions(self, now: Optional[float] = None) -> list:
+        now = now if now is not None else time.time()
+        return sorted(((entry[0], max(int(now - entry[1]), 0)) for entry in self._online.values()), key=lambda item: item[0].lower())
+
+
+async def presence_reconcile_task(bot, logger, cfg, tracker: PresenceTracker, fetch_players):
+    # fetch_players: Coroutine-Funktion → (Namen, max_players)
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        beat = cfg.get("HEARTBEAT")
+        if beat:
+            beat()
+        try:
+            names, max_players = await fetch_players()
+            if names is not None:
+                tracker.reconcile(names, max_players)
+        except Exception as exc:
+            logger.debug("Presence-Abgleich fehlgeschlagen: %s", exc)
+            tracker.mark_unreachable()
+        await asyncio.sleep(cfg["PRESENCE_RECONCILE_SECONDS"])
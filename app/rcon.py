@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import deque
+
+from app.breaker import CircuitOpenError, STATE_OPEN
+
+PRIORITY_ADMIN = 0
+PRIORITY_SYSTEM = 1
+PRIORITY_CHAT = 2
+
+PRIORITY_NAMES = {PRIORITY_ADMIN: "admin", PRIORITY_SYSTEM: "system", PRIORITY_CHAT: "chat"}
+
+# Minecraft kürzt "say"-Nachrichten nicht, aber sehr lange Zeilen sind im Chat unlesbar
+MAX_MERGED_SAY_LENGTH = 240
+
+
+class RconQueueFull(Exception):
+    pass
+
+
+class RconScheduler:
+    # Ein Worker, eine persistente RCON-Verbindung, drei Prioritätsklassen
+    # (admin > system > chat) mit eigenen Ratenlimits. Die Chat-Queue ist begrenzt
+    # und fasst unter Last Nachrichten zusammen bzw. verwirft die ältesten.
+
+    def __init__(self, client_factory, logger, rates=None, chat_queue_size: int = 50, idle_close_seconds: float = 60.0, breaker=None):
+        self._client_factory = client_factory
+        self._breaker = breaker
+        self._logger = logger
+        # Befehle pro Sekunde je Klasse (None = unbegrenzt)
+        self._rates = rates or {PRIORITY_ADMIN: None, PRIORITY_SYSTEM: 10.0, PRIORITY_CHAT: 4.0}
+        self._chat_queue_size = chat_queue_size
+        self._idle_close_seconds = idle_close_seconds
+        self._queues = {prio: deque() for prio in PRIORITY_NAMES}
+        self._next_allowed = {prio: 0.0 for prio in PRIORITY_NAMES}
+        self._wakeup = asyncio.Event()
+        self._client = None
+        self._last_used = 0.0
+        self.counters = {"executed": 0, "failed": 0, "merged": 0, "dropped": 0, "timeouts": 0, "rejected": 0}
+
+    def _fail_fast(self) -> None:
+        # Server bekannt down → sofort ablehnen statt in die Queue zu legen
+        if self._breaker is not None and self._breaker.state == STATE_OPEN:
+            self.counters["rejected"] += 1
+            raise CircuitOpenError("RCON nicht erreichbar (Circuit offen)")
+
+    async def run(self, priority: int, fn, timeout: float = 10.0, retry: bool = True):
+        # fn(client) läuft blockierend im Worker-Thread; Ergebnis kommt über ein Future zurück.
+        # retry=False für Befehle, die bei doppelter Ausführung sichtbar wären (z. B. say)
+        self._fail_fast()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append({"fn": fn, "futures": [future], "text": None, "retry": retry})
+        self._wakeup.set()
+        return await self._await(future, timeout)
+
+    async def say(self, text: str, timeout: float = 10.0):
+        self._fail_fast()
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[PRIORITY_CHAT]
+        if len(queue) >= self._chat_queue_size:
+            last = queue[-1]
+            merged = last["text"] + " | " + text
+            if len(merged) <= MAX_MERGED_SAY_LENGTH:
+                last["text"] = merged
+                last["futures"].append(future)
+                self.counters["merged"] += 1
+                return await self._await(future, timeout)
+            dropped = queue.popleft()
+            self.counters["dropped"] += 1
+            for fut in dropped["futures"]:
+                if not fut.done():
+                    fut.set_exception(RconQueueFull("Chat-Queue voll, Nachricht verworfen"))
+        queue.append({"fn": None, "futures": [future], "text": text, "retry": False})
+        self._wakeup.set()
+        return await self._await(future, timeout)
+
+    async def _await(self, future, timeout: float):
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            # Worker überspringt Jobs, deren Futures alle bereits erledigt sind
+            if not future.done():
+                future.cancel()
+            raise
+
+    def stats(self) -> dict:
+        data = dict(self.counters)
+        data["queued"] = {PRIORITY_NAMES[prio]: len(queue) for prio, queue in self._queues.items()}
+        data["connected"] = self._client is not None
+        return data
+
+    def _pick(self, now: float):
+        # Liefert (Job, None) oder (None, Wartezeit)
+        wait = None
+        for prio in sorted(self._queues):
+            queue = self._queues[prio]
+            while queue and all(fut.done() for fut in queue[0]["futures"]):
+                queue.popleft()
+            if not queue:
+                continue
+            if now >= self._next_allowed[prio]:
+                rate = self._rates.get(prio)
+                self._next_allowed[prio] = now + (1.0 / rate if rate else 0.0)
+                return queue.popleft(), None
+            delay = self._next_allowed[prio] - now
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    def _connect(self):
+        client = self._client_factory()
+        client.__enter__()
+        return client
+
+    def _close(self):
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def _execute(self, job):
+        fn = job["fn"] or (lambda client, text=job["text"]: client.say(text))
+        reused = self._client is not None
+        if self._client is None:
+            self._client = self._connect()
+        try:
+            return fn(self._client)
+        except Exception:
+            self._close()
+            # say kann den Server schon erreicht haben, bevor das Lesen der Antwort scheitert
+            if not reused or not job["retry"]:
+                raise
+        # Wiederverwendete Verbindung war evtl. tot → einmal frisch verbinden
+        self._client = self._connect()
+        return fn(self._client)
+
+    async def serve(self, heartbeat=None) -> None:
+        try:
+            while True:
+                if heartbeat:
+                    heartbeat()
+                job, wait = self._pick(time.monotonic())
+                if job is None:
+                    self._wakeup.clear()
+                    if wait is None and self._client is not None:
+                        wait = max(self._idle_close_seconds - (time.monotonic() - self._last_used), 0.0)
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        if self._client is not None and time.monotonic() - self._last_used >= self._idle_close_seconds:
+                            await asyncio.to_thread(self._close)
+                    continue
+                try:
+                    if self._breaker is not None:
+                        self._breaker.check()
+                    try:
+                        result = await asyncio.to_thread(self._execute, job)
+                    except Exception as exc:
+                        if self._breaker is not None:
+                            self._breaker.record_failure(exc)
+                        raise
+                    if self._breaker is not None:
+                        self._breaker.record_success()
+                    self.counters["executed"] += 1
+                    for fut in job["futures"]:
+                        if not fut.done():
+                            fut.set_result(result)
+                except Exception as exc:
+                    self.counters["failed"] += 1
+                    for fut in job["futures"]:
+                        if not fut.done():
+                            fut.set_exception(exc)
+                self._last_used = time.monotonic()
+        finally:
+            await asyncio.to_thread(self._close)
@@ -0,0 +1,155 @@
+import asyncio
+import base64
+import json
+import time
+from collections import deque
+
+FORMAT_VERSION = 1
+# Header, die für das Replay nötig sind; Signaturen werden beim Replay neu berechnet
+RECORDED_HEADERS = ("X-GitHub-Event", "Content-Type")
+
+
+def _jsonable(value):
+    # Query-Stats (NamedTuple/Dict) und RCON-Antworten in JSON-taugliche Form bringen
+    if hasattr(value, "_asdict"):
+        value = value._asdict()
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class RecordingRconClient:
+    # Reicht alle Aufrufe an den echten mcipc-Client durch und zeichnet Antwort bzw. Fehler auf
+
+    def __init__(self, client, recorder):
+        self._client = client
+        self._recorder = recorder
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._client.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args):
+            try:
+                result = attr(*args)
+            except Exception as exc:
+                self._recorder.rcon(name, args, error=exc)
+                raise
+            self._recorder.rcon(name, args, result=result)
+            return result
+
+        return call
+
+
+class TrafficRecorder:
+    # Zeichnet eingehenden Verkehr (Gateway-Nachrichten, Webhook-Requests, Bridge-Events) und
+    # RCON-/Query-Antworten als NDJSON mit Zeitstempel in eine Append-only-Datei auf.
+    # Zeilen werden im Hot-Path nur serialisiert und gepuffert, geschrieben wird gebündelt
+    # im Thread. Abspielen: python -m app.replay <datei>
+
+    def __init__(self, path: str, logger, flush_seconds: float = 1.0):
+        self._path = path
+        self._logger = logger
+        self._flush_seconds = flush_seconds
+        self._buffer = deque()  # append/popleft threadsicher (RCON-Antworten kommen aus dem Worker-Thread)
+        self.counters = {"recorded": 0, "failed": 0}
+
+    def _append(self, kind: str, record: dict) -> None:
+        record["t"] = round(time.time(), 6)
+        record["k"] = kind
+        try:
+            self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        except Exception as exc:
+            self.counters["failed"] += 1
+            self._logger.debug("Aufzeichnung übersprungen (%s): %s", kind, exc)
+
+    def meta(self, info: dict) -> None:
+        # Beim Start: Konfiguration/Features, damit das Replay denselben Zustand herstellt
+        self._append("meta", {"v": FORMAT_VERSION, **_jsonable(info)})
+
+    def message(self, message) -> None:
+        self._append("msg", {
+            "id": message.id,
+            "ch": message.channel.id,
+            "g": message.guild.id if message.guild else None,
+            "a": message.author.id,
+            "n": message.author.name,
+            "dn": getattr(message.author, "display_name", None),
+            "bot": bool(message.author.bot),
+            "wh": message.webhook_id,
+            "c": message.content,
+        })
+
+    async def http(self, source: str, request, verified: bool) -> None:
+        # verified: Signatur/JSON waren gültig (das Replay signiert mit eigenem Secret neu)
+        body = await request.read()
+        record = {
+            "src": source,
+            "ok": verified,
+            "h": {name: request.headers[name] for name in RECORDED_HEADERS if name in request.headers},
+        }
+        try:
+            record["b"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            record["b64"] = base64.b64encode(body).decode("ascii")
+        self._append("http", record)
+
+    def event(self, source: str, event: dict) -> None:
+        # Bereits kompakte Events (Log-Tail, Ingress-Worker)
+        self._append("ev", {"src": source, "e": _jsonable(event)})
+
+    def rcon(self, method: str, args, result=None, error=None) -> None:
+        record = {"m": method, "a": _jsonable(args)}
+        if error is not None:
+            record["err"] = str(error) or type(error).__name__
+        else:
+            record["r"] = _jsonable(result)
+        self._append("rcon", record)
+
+    def query(self, full: bool, result=None, error=None) -> None:
+        record = {"full": full}
+        if error is not None:
+            record["err"] = str(error) or type(error).__name__
+        else:
+            record["r"] = _jsonable(result)
+        self._append("query", record)
+
+    def wrap_rcon(self, client):
+        return RecordingRconClient(client, self)
+
+    def _write(self, lines) -> None:
+        with open(self._path, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+
+    async def flush(self) -> None:
+        lines = [self._buffer.popleft() for _ in range(len(self._buffer))]
+        if not lines:
+            return
+        try:
+            await asyncio.to_thread(self._write, lines)
+            self.counters["recorded"] += len(lines)
+        except Exception as exc:
+            self.counters["failed"] += len(lines)
+            self._logger.warning("Aufzeichnung: %d Einträge nicht geschrieben: %s", len(lines), exc)
+
+    async def serve(self, heartbeat=None) -> None:
+        try:
+            while True:
+                if heartbeat:
+                    heartbeat()
+                await asyncio.sleep(self._flush_seconds)
+                await self.flush()
+        finally:
+            await self.flush()
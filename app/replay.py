@@ -0,0 +1,438 @@
+import argparse
+import asyncio
+import base64
+import cProfile
+import hashlib
+import hmac
+import importlib
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_DISABLE_VOICE", "1")
+
+import discord
+from discord.ext import commands
+
+from app.ingress import decode_batch_body
+
+# Spielt eine Aufnahme von app.recorder gegen die echten Handler aus bot.py ab.
+# Discord, RCON und Query sind durch Stubs ersetzt; RCON-/Query-Antworten kommen aus der
+# Aufnahme. Alles, was der Bot nach außen schickt, wird gesammelt (--out, zum Vergleichen).
+#
+#   python -m app.replay aufnahme.ndjson [--realtime [--speed 2]] [--out ausgaben.ndjson] [--profile replay.prof]
+
+REPLAY_SECRET = "replay"
+SEED = 0
+
+logger = logging.getLogger("betterMCbot.replay")
+
+
+def load_recording(path: str):
+    # → (Meta des ersten Starts, Einträge in Aufnahme-Reihenfolge)
+    meta, records = {}, []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # abgeschnittene letzte Zeile (Absturz während des Schreibens)
+            if record.get("k") == "meta":
+                meta = meta or record
+            else:
+                records.append(record)
+    return meta, records
+
+
+def prepare_environment(meta: dict, workdir: str) -> None:
+    # Muss vor dem Import von bot.py laufen: Konfig aus der Aufnahme, alles Persistente ins
+    # Temp-Verzeichnis, keine Supabase-/Discord-/Server-Verbindungen
+    config_path = os.path.join(workdir, "config.json")
+    with open(config_path, "w", encoding="utf-8") as fh:
+        json.dump(meta.get("config") or {}, fh)
+    features = meta.get("features") or {}
+    os.environ.update({
+        "DISCORD_TOKEN": "replay",
+        "CONFIG_PATH": config_path,
+        "SUPABASE_URL": "",
+        "SUPABASE_SERVICE_ROLE_KEY": "",
+        "SUPABASE_ANON_KEY": "",
+        "SERVER_IP": "replay" if features.get("rcon") or features.get("query") else "",
+        "RCON_PORT": "25575" if features.get("rcon") else "",
+        "RCON_PASSWORD": REPLAY_SECRET if features.get("rcon") else "",
+        "QUERY_PORT": "25565" if features.get("query") else "",
+        "GITHUB_WEBHOOK_SECRET": REPLAY_SECRET,
+        "MC_WEBHOOK_SECRET": REPLAY_SECRET if features.get("mc_webhook") else "",
+        # Ohne Journal wird direkt zugestellt: jede Ausgabe gehört zum auslösenden Event
+        "BRIDGE_JOURNAL_PATH": "",
+        "CHAT_ARCHIVE_PATH": "",
+        "RECORD_PATH": "",
+        "MC_LOG_PATH": "",
+        "STATUS_CHANNEL_ID": "",
+        "MC_CHAT_WEBHOOKS": "0",
+        "HTTP_INGRESS_MODE": "inline",
+        "WHITELIST_CACHE_PATH": os.path.join(workdir, "whitelist_cache.json"),
+        "PLAYER_STATS_PATH": os.path.join(workdir, "player_stats.json"),
+        "MC_LOG_OFFSET_PATH": os.path.join(workdir, "mc_log_offset.json"),
+    })
+    for key, value in (meta.get("env") or {}).items():
+        os.environ[key] = "" if value is None else str(value)
+
+
+class Outputs:
+    # Alles, was der Bot während des Replays nach außen schickt, mit Index des auslösenden Eintrags
+
+    def __init__(self):
+        self.items = []
+        self.current = None
+        self._next_id = 1
+
+    def add(self, kind: str, **fields) -> None:
+        self.items.append({"i": self.current, "k": kind, **fields})
+
+    def next_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def count(self, kind: str) -> int:
+        return sum(1 for item in self.items if item["k"] == kind)
+
+
+class StubMessage:
+    # Eingehende (aus der Aufnahme) und vom Bot gesendete Nachrichten
+    _state = None
+
+    def __init__(self, channel, message_id, content="", author=None, webhook_id=None, created_at=None):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.webhook_id = webhook_id
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.attachments = []
+        self.embeds = []
+        self.mentions = []
+        self.reference = None
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{message_id}"
+
+    async def edit(self, **kwargs):
+        self.channel.out.add("edit", ch=self.channel.id, id=self.id, c=kwargs.get("content"), embed=_embed_dict(kwargs.get("embed")))
+        return self
+
+    async def delete(self, **kwargs):
+        self.channel.out.add("delete", ch=self.channel.id, id=self.id)
+
+    async def pin(self, **kwargs):
+        self.channel.out.add("pin", ch=self.channel.id, id=self.id)
+
+    async def add_reaction(self, emoji):
+        self.channel.out.add("react", ch=self.channel.id, id=self.id, emoji=str(emoji))
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class StubChannel:
+    type = discord.ChannelType.text
+
+    def __init__(self, channel_id, guild, out: Outputs):
+        self.id = channel_id
+        self.guild = guild
+        self.out = out
+        self.name = f"replay-{channel_id}"
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, content=None, **kwargs):
+        message = StubMessage(self, self.out.next_id(), content=content)
+        self.out.add("send", ch=self.id, id=message.id, c=content, embed=_embed_dict(kwargs.get("embed")))
+        return message
+
+    def get_partial_message(self, message_id):
+        return StubMessage(self, message_id)
+
+    async def delete_messages(self, messages, **kwargs):
+        self.out.add("bulk_delete", ch=self.id, ids=[message.id for message in messages])
+
+    async def history(self, **kwargs):
+        return
+        yield
+
+    def permissions_for(self, member):
+        # Commands laufen im Replay mit vollen Rechten
+        return discord.Permissions.all()
+
+
+def _embed_dict(embed):
+    if embed is None:
+        return None
+    to_dict = getattr(embed, "to_dict", None)
+    data = to_dict() if to_dict else embed
+    if isinstance(data, dict):
+        data.pop("timestamp", None)  # für reproduzierbare Ausgaben
+    return data
+
+
+class RecordedResponses:
+    # Antworten je (Methode, Argumente) in Aufnahme-Reihenfolge; ist die Liste aufgebraucht,
+    # gilt die zuletzt gelieferte Antwort weiter
+
+    def __init__(self):
+        self._queues = defaultdict(deque)
+        self._last = {}
+
+    @staticmethod
+    def key(method, args):
+        return method + ":" + json.dumps(args, ensure_ascii=False, sort_keys=True)
+
+    def add(self, key: str, record: dict) -> None:
+        self._queues[key].append(record)
+
+    def next(self, key: str):
+        queue = self._queues.get(key)
+        if queue:
+            self._last[key] = queue.popleft()
+        record = self._last.get(key)
+        if record is None:
+            return None
+        if "err" in record:
+            raise ConnectionError(record["err"])
+        return record.get("r")
+
+
+class ReplayRconClient:
+    def __init__(self, responses: RecordedResponses, out: Outputs):
+        self._responses = responses
+        self._out = out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args):
+            args = list(args)
+            self._out.add("rcon", m=name, a=args)
+            result = self._responses.next(RecordedResponses.key(name, args))
+            return "" if result is None else result
+
+        return call
+
+
+class ReplayQueryClient:
+    def __init__(self, responses: RecordedResponses):
+        self._responses = responses
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def stats(self, full=False):
+        result = self._responses.next(RecordedResponses.key("stats", [bool(full)]))
+        if result is None:
+            raise ConnectionError("keine Query-Antwort in der Aufnahme")
+        return result
+
+
+class _StubRequest:
+    def __init__(self, body: bytes, headers: dict):
+        from multidict import CIMultiDict
+        self._body = body
+        self.headers = CIMultiDict(headers)
+
+    async def read(self):
+        return self._body
+
+
+class Replayer:
+    def __init__(self, botmod, records, out: Outputs):
+        self._bot = botmod
+        self._records = records
+        self._out = out
+        self._channels = {}
+        self._guild = SimpleNamespace(id=0, name="replay", shard_id=0)
+        self.timings = defaultdict(list)
+        self.errors = 0
+        responses = RecordedResponses()
+        for record in records:
+            if record["k"] == "rcon":
+                responses.add(RecordedResponses.key(record["m"], record.get("a") or []), record)
+            elif record["k"] == "query":
+                responses.add(RecordedResponses.key("stats", [bool(record.get("full"))]), record)
+        self._responses = responses
+
+    def _channel(self, channel_id):
+        if channel_id is None:
+            return None
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = StubChannel(channel_id, self._guild, self._out)
+        return channel
+
+    def install(self) -> None:
+        # Discord-/Server-Anbindung von bot.py durch Stubs ersetzen
+        botmod, bot = self._bot, self._bot.bot
+        bot.get_channel = self._channel
+
+        async def fetch_channel(channel_id):
+            return self._channel(channel_id)
+
+        bot.fetch_channel = fetch_channel
+        bot._connection.user = SimpleNamespace(id=0, name="betterMCbot", bot=True, mention="<@0>")
+        botmod.Client = lambda *args, **kwargs: ReplayRconClient(self._responses, self._out)
+        botmod.QueryClient = lambda *args, **kwargs: ReplayQueryClient(self._responses)
+
+        async def ctx_send(ctx, content=None, **kwargs):
+            return await ctx.channel.send(content, **kwargs)
+
+        commands.Context.send = ctx_send
+        commands.Context.reply = ctx_send
+        botmod.register_text_commands(bot, botmod._build_command_deps())
+
+    async def _handle_msg(self, record):
+        author = SimpleNamespace(
+            id=record.get("a"), name=record.get("n") or "?", display_name=record.get("dn") or record.get("n") or "?",
+            bot=bool(record.get("bot")), mention=f"<@{record.get('a')}>",
+        )
+        message = StubMessage(
+            self._channel(record.get("ch")), record.get("id"), content=record.get("c") or "", author=author,
+            webhook_id=record.get("wh"), created_at=datetime.fromtimestamp(record["t"], timezone.utc),
+        )
+        await self._bot.on_message(message)
+
+    async def _handle_http(self, record):
+        if "b64" in record:
+            body = base64.b64decode(record["b64"])
+        else:
+            body = (record.get("b") or "").encode("utf-8")
+        headers = dict(record.get("h") or {})
+        source = record.get("src")
+        # Gültige Requests mit dem Replay-Secret neu signieren, ungültige bleiben ungültig
+        if source == "github":
+            signature = "sha256=" + hmac.new(REPLAY_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Hub-Signature-256"] = signature if record.get("ok") else "sha256=invalid"
+            response = await self._bot.verify_and_handle_github(_StubRequest(body, headers))
+        else:
+            # Batches sind über das entpackte NDJSON signiert
+            signed = decode_batch_body(body) if source == "mc_batch" else body
+            signature = "sha256=" + hashlib.sha256(REPLAY_SECRET.encode("utf-8") + signed).hexdigest()
+            headers["X-MC-Signature"] = signature if record.get("ok") else "sha256=invalid"
+            handler = self._bot.verify_and_handle_mc_batch if source == "mc_batch" else self._bot.verify_and_handle_mc
+            response = await handler(_StubRequest(body, headers))
+        self._out.add("http", src=source, status=response.status, text=response.text)
+
+    async def _handle_event(self, record):
+        if record.get("src") == "github":
+            status = await self._bot.handle_github_event(record.get("e") or {})
+        elif record.get("src") == "mc_batch":
+            status = await self._bot._handle_ingress_mc_batch(record.get("e") or {})
+        else:
+            status = await self._bot.handle_mc_event(record.get("e") or {})
+        self._out.add("event", src=record.get("src"), status=status)
+
+    async def run(self, realtime: bool = False, speed: float = 1.0) -> float:
+        handlers = {"msg": self._handle_msg, "http": self._handle_http, "ev": self._handle_event}
+        botmod = self._bot
+        rcon_task = asyncio.create_task(botmod.RCON.serve()) if botmod.HAS_RCON else None
+        first = self._records[0]["t"] if self._records else 0.0
+        started = time.monotonic()
+        try:
+            for index, record in enumerate(self._records):
+                handler = handlers.get(record["k"])
+                if handler is None:
+                    continue
+                if realtime:
+                    delay = (record["t"] - first) / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                self._out.current = index
+                label = record["k"] if record["k"] == "msg" else f"{record['k']}:{record.get('src')}"
+                begin = time.perf_counter()
+                try:
+                    await handler(record)
+                except Exception as exc:
+                    self.errors += 1
+                    self._out.add("error", e=repr(exc))
+                    logger.warning("Eintrag %d (%s) fehlgeschlagen: %s", index, label, exc)
+                self.timings[label].append(time.perf_counter() - begin)
+        finally:
+            if rcon_task is not None:
+                rcon_task.cancel()
+                await asyncio.gather(rcon_task, return_exceptions=True)
+        return time.monotonic() - started
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def format_summary(replayer: Replayer, out: Outputs, elapsed: float) -> str:
+    total = sum(len(values) for values in replayer.timings.values())
+    lines = [f"Replay: {total} Einträge in {elapsed:.2f} s ({total / elapsed if elapsed > 0 else 0:.0f}/s)"]
+    for label in sorted(replayer.timings):
+        values = sorted(replayer.timings[label])
+        lines.append(
+            f"  {label:<12} n={len(values):<6} p50={_percentile(values, 0.5) * 1000:.2f} ms  "
+            f"p95={_percentile(values, 0.95) * 1000:.2f} ms  max={values[-1] * 1000:.2f} ms"
+        )
+    lines.append(
+        f"Ausgaben: {out.count('send')} Discord-Nachrichten, {out.count('rcon')} RCON-Aufrufe, "
+        f"{out.count('edit')} Edits, {replayer.errors} Fehler"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description="Aufnahme (RECORD_PATH) gegen die Bot-Handler abspielen")
+    parser.add_argument("recording")
+    parser.add_argument("--realtime", action="store_true", help="Abstände aus der Aufnahme einhalten (sonst so schnell wie möglich)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Zeitraffer für --realtime, z. B. 10")
+    parser.add_argument("--out", help="Ausgaben als NDJSON schreiben (für Regressionsvergleiche)")
+    parser.add_argument("--profile", help="cProfile-Statistik in diese Datei schreiben")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    meta, records = load_recording(args.recording)
+    workdir = tempfile.mkdtemp(prefix="betterMCbot-replay-")
+    prepare_environment(meta, workdir)
+    botmod = importlib.import_module("bot")
+    logging.getLogger().setLevel(args.log_level.upper())
+    random.seed(SEED)  # z. B. Death-Antworten: gleiche Aufnahme → gleiche Ausgaben
+
+    out = Outputs()
+    replayer = Replayer(botmod, records, out)
+    replayer.install()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    elapsed = asyncio.run(replayer.run(realtime=args.realtime, speed=max(args.speed, 0.001)))
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            for item in out.items:
+                fh.write(json.dumps(item, ensure_ascii=False, sort_keys=True, default=str) + "\n")
+    print(format_summary(replayer, out, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import threading
 from typing import Optional
 from dotenv import load_dotenv
 from supabase import create_client
@@ -104,3 +105,16 @@ def save_config(data: dict):
             logger.warning("Supabase Save fehlgeschlagen: %s", exc)
     save_json_file(CONFIG_PATH, data)
 
+# Schreiber laufen im Event-Loop und in Threads (z. B. Ephemeral-Persistenz); ohne Lock
+# überschreibt der zuletzt Speichernde die Schlüssel der anderen
+_config_lock = threading.Lock()
+
+def update_config(changes: Optional[dict] = None, remove=()) -> dict:
+    with _config_lock:
+        data = load_config()
+        data.update(changes or {})
+        for key in remove:
+            data.pop(key, None)
+        save_config(data)
+        return data
+
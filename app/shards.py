@@ -0,0 +1,65 @@
+import math
+import time
+from typing import Optional
+
+
+def parse_shard_ids(value) -> Optional[list]:
+    # "0,1,4-7" → [0, 1, 4, 5, 6, 7]; leer → None (alle Shards in diesem Prozess)
+    ids = set()
+    for part in (value or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ids.update(range(int(start), int(end) + 1))
+        else:
+            ids.add(int(part))
+    return sorted(ids) or None
+
+
+def shard_label(shard_ids) -> str:
+    # Für prozesseigene Dateien, z. B. "shard-2-3"
+    return "shard-" + "-".join(str(shard_id) for shard_id in shard_ids)
+
+
+class ShardMetrics:
+    # Zähler je Shard (Gateway-Verbindungen, verarbeitete Nachrichten); Latenz und Guild-Zahl
+    # kommen beim Abfragen direkt vom Bot. Ohne Sharding läuft alles unter Shard 0.
+
+    def __init__(self):
+        self._shards = {}
+
+    def _entry(self, shard_id) -> dict:
+        shard_id = shard_id or 0
+        entry = self._shards.get(shard_id)
+        if entry is None:
+            entry = self._shards[shard_id] = {"messages": 0, "connects": 0, "disconnects": 0, "resumes": 0, "last_disconnect": None}
+        return entry
+
+    def message(self, shard_id) -> None:
+        self._entry(shard_id)["messages"] += 1
+
+    def connected(self, shard_id) -> None:
+        self._entry(shard_id)["connects"] += 1
+
+    def disconnected(self, shard_id) -> None:
+        entry = self._entry(shard_id)
+        entry["disconnects"] += 1
+        entry["last_disconnect"] = time.time()
+
+    def resumed(self, shard_id) -> None:
+        self._entry(shard_id)["resumes"] += 1
+
+    def snapshot(self, bot) -> dict:
+        latencies = dict(getattr(bot, "latencies", None) or [(0, bot.latency)])
+        guilds = {}
+        for guild in bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        result = {}
+        for shard_id in sorted(set(latencies) | set(self._shards)):
+            latency = latencies.get(shard_id)
+            entry = dict(self._entry(shard_id))
+            entry["latency_ms"] = round(latency * 1000) if latency is not None and math.isfinite(latency) else None
+            entry["guilds"] = guilds.get(shard_id, 0)
+            result[shard_id] = entry
+        return result
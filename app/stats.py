@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import re
+import time
+
+METRICS = ("deaths", "joins", "chat", "playtime")
+TOP_N = 10
+
+# Reihenfolge wichtig: spezifischere Muster zuerst
+DEATH_CAUSES = (
+    ("lava", re.compile(r"tried to swim in lava")),
+    ("void", re.compile(r"fell out of the world|left the confines|didn't want to live in the same world")),
+    ("sturz", re.compile(r"fell |hit the ground|experienced kinetic energy|discovered the floor|was doomed to fall")),
+    ("explosion", re.compile(r"blew up|was blown up|went off with a bang|was killed by \[Intentional Game Design\]")),
+    ("feuer", re.compile(r"burned to death|went up in flames|walked into fire|was burnt|walked into danger zone|was roasted")),
+    ("ertrunken", re.compile(r"drowned")),
+    ("verhungert", re.compile(r"starved")),
+    ("erstickt", re.compile(r"suffocated|was squished|was squashed")),
+    ("erfroren", re.compile(r"froze to death|was frozen")),
+    ("wither", re.compile(r"withered away")),
+    ("kampf", re.compile(r"was slain|was shot|was killed|was fireballed|was pummeled|was impaled|was stung|got finished off|was skewered|was obliterated")),
+)
+
+
+def classify_death(message: str) -> str:
+    for cause, pattern in DEATH_CAUSES:
+        if pattern.search(message or ""):
+            return cause
+    return "sonstiges"
+
+
+class PlayerStats:
+    # Spielerzähler (Tode nach Ursache, Joins, Chatzeilen, Spielzeit), inkrementell aus Bridge-Events.
+    # Ranglisten werden als Top-N je Metrik mitgeführt; da Zähler nur wachsen, reicht beim
+    # Erhöhen ein Vergleich mit dem letzten Platz. Gespeichert wird periodisch, nicht pro Event.
+
+    def __init__(self, path: str, logger, checkpoint_seconds: int = 60):
+        self._path = path
+        self._logger = logger
+        self._checkpoint_seconds = checkpoint_seconds
+        self._players = {}  # name.lower() → {"name", "deaths", "joins", "chat", "playtime", "causes"}
+        self._causes = {}   # serverweit: Ursache → Anzahl
+        self._top = {metric: [] for metric in METRICS}  # Liste von name.lower(), absteigend sortiert
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self._path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return
+        except Exception as exc:
+            self._logger.warning("Spielerstatistik konnte nicht geladen werden: %s", exc)
+            return
+        for entry in data.get("players", []):
+            if isinstance(entry, dict) and entry.get("name"):
+                record = self._entry(entry["name"])
+                for metric in METRICS:
+                    record[metric] = int(entry.get(metric) or 0)
+                record["causes"] = dict(entry.get("causes") or {})
+        self._causes = dict(data.get("causes") or {})
+        # Einmaliger Aufbau der Ranglisten; danach nur noch inkrementell
+        for metric in METRICS:
+            ranked = sorted(self._players, key=lambda key: self._players[key][metric], reverse=True)
+            self._top[metric] = [key for key in ranked if self._players[key][metric] > 0][:TOP_N]
+
+    def _entry(self, name: str) -> dict:
+        key = name.lower()
+        record = self._players.get(key)
+        if record is None:
+            record = {"name": name, "deaths": 0, "joins": 0, "chat": 0, "playtime": 0, "causes": {}}
+            self._players[key] = record
+        return record
+
+    def _bump(self, name: str, metric: str, amount: int = 1) -> dict:
+        record = self._entry(name)
+        record[metric] += amount
+        self._dirty = True
+        key = name.lower()
+        top = self._top[metric]
+        if key not in top:
+            if len(top) >= TOP_N and record[metric] <= self._players[top[-1]][metric]:
+                return record
+            top.append(key)
+        top.sort(key=lambda k: self._players[k][metric], reverse=True)
+        del top[TOP_N:]
+        return record
+
+    def record_join(self, name: str) -> None:
+        if name:
+            self._bump(name, "joins")
+
+    def record_chat(self, name: str) -> None:
+        if name:
+            self._bump(name, "chat")
+
+    def record_playtime(self, name: str, seconds: int) -> None:
+        if name and seconds > 0:
+            self._bump(name, "playtime", int(seconds))
+
+    def record_death(self, name: str, message: str) -> str:
+        cause = classify_death(message)
+        self._causes[cause] = self._causes.get(cause, 0) + 1
+        self._dirty = True
+        if name:
+            record = self._bump(name, "deaths")
+            record["causes"][cause] = record["causes"].get(cause, 0) + 1
+        return cause
+
+    def top(self, metric: str, limit: int = TOP_N) -> list:
+        return [(self._players[key]["name"], self._players[key][metric]) for key in self._top[metric][:limit]]
+
+    def top_causes(self, limit: int = 5) -> list:
+        return sorted(self._causes.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def player(self, name: str):
+        record = self._players.get((name or "").lower())
+        if record is None:
+            return None
+        result = dict(record, causes=dict(record["causes"]))
+        result["ranks"] = {
+            metric: self._top[metric].index(name.lower()) + 1
+            for metric in METRICS if name.lower() in self._top[metric]
+        }
+        return result
+
+    def _snapshot(self) -> dict:
+        return {
+            "players": [dict(record, causes=dict(record["causes"])) for record in self._players.values()],
+            "causes": dict(self._causes),
+            "saved_at": time.time(),
+        }
+
+    def _save(self, payload: dict) -> None:
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self._path)
+
+    async def reload(self) -> None:
+        # Nicht-Primärprozesse: Stand aus der vom Primärprozess geschriebenen Datei übernehmen
+        fresh = await asyncio.to_thread(PlayerStats, self._path, self._logger)
+        self._players, self._causes, self._top = fresh._players, fresh._causes, fresh._top
+
+    async def checkpoint(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._save, self._snapshot())
+        except Exception as exc:
+            self._dirty = True
+            self._logger.warning("Spielerstatistik konnte nicht gespeichert werden: %s", exc)
+
+    async def serve(self, heartbeat=None) -> None:
+        try:
+            while True:
+                if heartbeat:
+                    heartbeat()
+                await asyncio.sleep(self._checkpoint_seconds)
+                await self.checkpoint()
+        finally:
+            await self.checkpoint()
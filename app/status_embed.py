@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+import discord
+
+# Änderungen (z. B. mehrere Joins hintereinander) sammeln, bevor editiert wird
+DEBOUNCE_SECONDS = 3.0
+# Latenz nur grob anzeigen, sonst ändert sich der Inhalt bei jeder Messung
+LATENCY_BUCKETS = ((50, "🟢 < 50 ms"), (150, "🟡 < 150 ms"), (400, "🟠 < 400 ms"))
+
+
+def latency_label(ms):
+    if ms is None:
+        return "–"
+    for limit, label in LATENCY_BUCKETS:
+        if ms < limit:
+            return label
+    return "🔴 ≥ 400 ms"
+
+
+def render_status(snapshot: dict) -> dict:
+    # Snapshot → Embed-Dict (ohne Zeitstempel, damit der Hash nur bei echten Änderungen wechselt)
+    if not snapshot["online"]:
+        return {
+            "title": "Minecraft-Server",
+            "color": 0xE74C3C,
+            "fields": [{"name": "Status", "value": "🔴 Offline", "inline": True}],
+        }
+    players = snapshot["players"]
+    player_list = ", ".join(players) if players else "Niemand online"
+    if len(player_list) > 1024:
+        player_list = player_list[:1020] + " …"
+    fields = [
+        {"name": "Status", "value": "🟢 Online", "inline": True},
+        {"name": "Spieler", "value": f"{len(players)}/{snapshot.get('max_players') or '?'}", "inline": True},
+        {"name": "Latenz", "value": latency_label(snapshot.get("latency_ms")), "inline": True},
+        {"name": "Online", "value": player_list, "inline": False},
+    ]
+    if snapshot.get("motd"):
+        fields.insert(0, {"name": "MOTD", "value": str(snapshot["motd"])[:1024], "inline": False})
+    return {"title": "Minecraft-Server", "color": 0x2ECC71, "fields": fields}
+
+
+def content_hash(rendered: dict) -> str:
+    return hashlib.sha256(json.dumps(rendered, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class StatusBoard:
+    # Ein angepinntes Status-Embed im Status-Channel. Editiert wird nur, wenn sich der
+    # gerenderte Inhalt ändert; Presence-Änderungen wecken den Refresher sofort.
+
+    def __init__(self, logger, presence, query_stats=None, persist_message_id=None, message_id=None, refresh_seconds: int = 60):
+        self._logger = logger
+        self._presence = presence
+        self._query_stats = query_stats  # blockierend, (full) → Query-Stats; None = nur Presence
+        self._persist_message_id = persist_message_id  # blockierend, bekommt die Message-ID
+        self._refresh_seconds = refresh_seconds
+        self._wakeup = asyncio.Event()
+        self._channel_id = None
+        self.message_id = message_id
+        self.jump_url = None
+        self._last_hash = None
+        self.counters = {"renders": 0, "edits": 0}
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _snapshot(self) -> dict:
+        presence = self._presence
+        snapshot = {"online": presence.reachable is not False, "players": presence.online(), "max_players": presence.max_players}
+        if self._query_stats is None:
+            return snapshot
+        started = time.perf_counter()
+        try:
+            stats = await asyncio.to_thread(self._query_stats, True)
+        except Exception:
+            snapshot["online"] = False
+            return snapshot
+        snapshot["latency_ms"] = (time.perf_counter() - started) * 1000
+        try:
+            snapshot["motd"] = stats["host_name"]
+        except Exception:
+            snapshot["motd"] = None
+        if not presence.is_known():
+            snapshot["players"] = sorted(stats["players"], key=str.lower)
+            snapshot["max_players"] = stats["max_players"]
+        return snapshot
+
+    async def _publish(self, channel, rendered: dict) -> None:
+        embed = discord.Embed.from_dict(rendered)
+        embed.timestamp = datetime.now(timezone.utc)
+        embed.set_footer(text="Zuletzt geändert")
+        if self.message_id:
+            try:
+                message = await channel.get_partial_message(self.message_id).edit(embed=embed)
+                self.jump_url = message.jump_url
+                self.counters["edits"] += 1
+                return
+            except discord.NotFound:
+                self.message_id = None
+        message = await channel.send(embed=embed)
+        self.message_id = message.id
+        self.jump_url = message.jump_url
+        try:
+            await message.pin()
+        except discord.HTTPException as exc:
+            self._logger.warning("Status-Nachricht konnte nicht angepinnt werden: %s", exc)
+        if self._persist_message_id is not None:
+            await asyncio.to_thread(self._persist_message_id, message.id)
+
+    async def serve(self, bot, cfg) -> None:
+        await bot.wait_until_ready()
+        while not bot.is_closed():
+            beat = cfg.get("HEARTBEAT")
+            if beat:
+                beat()
+            channel_id = cfg["STATUS_CHANNEL_ID_INT"]
+            if channel_id != self._channel_id:
+                # Neuer Channel: alte Nachricht gehört nicht mehr dazu
+                if self._channel_id is not None:
+                    self.message_id = None
+                    self.jump_url = None
+                self._channel_id = channel_id
+                self._last_hash = None
+            if channel_id:
+                try:
+                    rendered = render_status(await self._snapshot())
+                    self.counters["renders"] += 1
+                    digest = content_hash(rendered)
+                    if digest != self._last_hash:
+                        channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+                        await self._publish(channel, rendered)
+                        self._last_hash = digest
+                except Exception as exc:
+                    self._logger.warning("Status-Embed konnte nicht aktualisiert werden: %s", exc)
+            await self._wait(cfg)
+
+    async def _wait(self, cfg) -> None:
+        # Bis Intervall, Konfig-Änderung oder Presence-Änderung (dann kurz sammeln)
+        sleeper = asyncio.ensure_future(cfg.sleep(self._refresh_seconds))
+        waker = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            done, _ = await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sleeper, waker):
+                task.cancel()
+        if waker in done:
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+        self._wakeup.clear()
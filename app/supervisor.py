@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime, timezone
+
+
+class TaskSupervisor:
+    # Hält jeden Hintergrundjob als Singleton; abgestürzte Jobs werden mit
+    # exponentiellem Backoff neu gestartet.
+
+    def __init__(self, logger, initial_backoff: float = 5.0, max_backoff: float = 300.0):
+        self._logger = logger
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._jobs = {}
+
+    def is_running(self, name: str) -> bool:
+        job = self._jobs.get(name)
+        # Ein abgebrochener, noch nicht beendeter Task zählt nicht mehr als laufend
+        return bool(job and job["task"] and not job["task"].done() and job["state"] != "stopped")
+
+    def start(self, name: str, factory) -> bool:
+        # factory: Callable ohne Argumente, die eine neue Coroutine liefert
+        if self.is_running(name):
+            return False
+        job = self._jobs.setdefault(name, {
+            "state": "pending",
+            "started_at": None,
+            "last_run": None,
+            "restarts": 0,
+            "last_error": None,
+            "task": None,
+        })
+        job["state"] = "starting"
+        job["task"] = asyncio.get_running_loop().create_task(self._run(name, factory), name=f"job:{name}")
+        return True
+
+    def cancel(self, name: str) -> None:
+        job = self._jobs.get(name)
+        if job and job["task"] and not job["task"].done():
+            job["task"].cancel()
+            job["state"] = "stopped"
+
+    async def stop(self, name: str) -> None:
+        job = self._jobs.get(name)
+        if not job or not job["task"]:
+            return
+        task = job["task"]
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        job["state"] = "stopped"
+
+    async def stop_all(self) -> None:
+        for name in list(self._jobs):
+            await self.stop(name)
+
+    def touch(self, name: str) -> None:
+        job = self._jobs.get(name)
+        if job is not None:
+            job["last_run"] = datetime.now(timezone.utc)
+
+    def heartbeat(self, name: str):
+        return lambda: self.touch(name)
+
+    def status(self) -> dict:
+        result = {}
+        for name, job in self._jobs.items():
+            result[name] = {
+                "state": job["state"],
+                "started_at": job["started_at"].isoformat() if job["started_at"] else None,
+                "last_run": job["last_run"].isoformat() if job["last_run"] else None,
+                "restarts": job["restarts"],
+                "last_error": job["last_error"],
+            }
+        return result
+
+    async def _run(self, name: str, factory) -> None:
+        job = self._jobs[name]
+        backoff = self._initial_backoff
+        me = asyncio.current_task()
+        while True:
+            job["state"] = "running"
+            job["started_at"] = datetime.now(timezone.utc)
+            job["last_run"] = job["started_at"]
+            try:
+                await factory()
+                job["state"] = "done"
+                self._logger.info("Job %s beendet", name)
+                return
+            except asyncio.CancelledError:
+                # Nach cancel()+start() gehört der Job-Eintrag bereits dem neuen Task
+                if job["task"] is me:
+                    job["state"] = "stopped"
+                raise
+            except Exception as exc:
+                job["restarts"] += 1
+                job["last_error"] = f"{type(exc).__name__}: {exc}"
+                job["state"] = "backoff"
+                # Lief der Job lange stabil, Backoff zurücksetzen
+                uptime = (datetime.now(timezone.utc) - job["started_at"]).total_seconds()
+                if uptime > self._max_backoff:
+                    backoff = self._initial_backoff
+                self._logger.warning("Job %s abgestürzt (%s), Neustart in %.0fs", name, exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self._max_backoff)
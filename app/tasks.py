@@ -5,22 +5,48 @@ from zoneinfo import ZoneInfo
 import aiohttp
 from aiohttp import web
 
+
+def _heartbeat(cfg):
+    beat = cfg.get("HEARTBEAT")
+    if beat:
+        beat()
+
+
+async def _sleep(cfg, seconds):
+    # Live-Konfig (app.live_config) weckt den Task bei Änderungen sofort
+    sleeper = getattr(cfg, "sleep", None)
+    if sleeper is not None:
+        return await sleeper(seconds)
+    await asyncio.sleep(seconds)
+    return False
+
+
 async def github_updates_task(bot, logger, fetch_latest_commits, cfg):
     _last_seen_commit_sha = None
+    _tracked_repo = None
     await bot.wait_until_ready()
     async with aiohttp.ClientSession() as session:
         while not bot.is_closed():
+            _heartbeat(cfg)
             try:
                 if not cfg["HAS_GITHUB"] or cfg["WEBHOOK_ACTIVE"]:
-                    await asyncio.sleep(cfg["GITHUB_POLL_INTERVAL"])
+                    await _sleep(cfg, cfg["GITHUB_POLL_INTERVAL"])
                     continue
                 channel = bot.get_channel(cfg["GITHUB_UPDATES_CHANNEL_ID_INT"])
                 if channel is None:
-                    await asyncio.sleep(cfg["GITHUB_POLL_INTERVAL"])
-                    continue
-                commits = await fetch_latest_commits(session, cfg["GITHUB_REPO"])
+                    # Bei Sharding kann die Guild in einem anderen Prozess liegen → per REST holen
+                    try:
+                        channel = await bot.fetch_channel(cfg["GITHUB_UPDATES_CHANNEL_ID_INT"])
+                    except Exception:
+                        await _sleep(cfg, cfg["GITHUB_POLL_INTERVAL"])
+                        continue
+                if cfg["GITHUB_REPO"] != _tracked_repo:
+                    # Repo geändert: Referenz-Commit neu bestimmen
+                    _tracked_repo = cfg["GITHUB_REPO"]
+                    _last_seen_commit_sha = None
+                commits = await fetch_latest_commits(session, _tracked_repo)
                 if not isinstance(commits, list) or not commits:
-                    await asyncio.sleep(cfg["GITHUB_POLL_INTERVAL"])
+                    await _sleep(cfg, cfg["GITHUB_POLL_INTERVAL"])
                     continue
                 newest = commits[0]
                 sha = newest.get("sha")
@@ -41,22 +67,23 @@ async def github_updates_task(bot, logger, fetch_latest_commits, cfg):
                     _last_seen_commit_sha = sha
             except Exception as exc:
                 logger.warning("GitHub Updates Fehler: %s", exc)
-            await asyncio.sleep(cfg["GITHUB_POLL_INTERVAL"])
+            await _sleep(cfg, cfg["GITHUB_POLL_INTERVAL"])
 
 
 async def message_cleanup_task(bot, logger, cfg):
     await bot.wait_until_ready()
     while not bot.is_closed():
+        _heartbeat(cfg)
         try:
             if not cfg["CHAT_CHANNEL_ID_INT"] or (cfg["MESSAGE_CLEANUP_RETENTION_HOURS_INT"] or 0) <= 0:
-                await asyncio.sleep(cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
+                await _sleep(cfg, cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
                 continue
             channel = bot.get_channel(cfg["CHAT_CHANNEL_ID_INT"])
             if channel is None:
                 try:
                     channel = await bot.fetch_channel(cfg["CHAT_CHANNEL_ID_INT"])
                 except Exception:
-                    await asyncio.sleep(cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
+                    await _sleep(cfg, cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
                     continue
             cutoff = datetime.now(timezone.utc) - timedelta(hours=cfg["MESSAGE_CLEANUP_RETENTION_HOURS_INT"])
             async for msg in channel.history(limit=200, oldest_first=False):
@@ -67,12 +94,15 @@ async def message_cleanup_task(bot, logger, cfg):
                         pass
         except Exception as exc:
             logger.warning("Cleanup Fehler: %s", exc)
-        await asyncio.sleep(cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
+        await _sleep(cfg, cfg["MESSAGE_CLEANUP_INTERVAL_MINUTES_INT"] * 60)
 
 
-async def start_web_server(bot, logger, cfg, verify_and_handle_github, verify_and_handle_mc=None):
+async def start_web_server(bot, logger, cfg, verify_and_handle_github, verify_and_handle_mc=None, verify_and_handle_mc_batch=None, mc_ws_handler=None):
     async def handle_health(request: web.Request):
-        return web.Response(text="ok")
+        health = cfg.get("HEALTH")
+        if health is None:
+            return web.Response(text="ok")
+        return web.json_response(health())
 
     async def github_webhook_handler(request: web.Request):
         return await verify_and_handle_github(request)
@@ -82,17 +112,33 @@ async def start_web_server(bot, logger, cfg, verify_and_handle_github, verify_an
             return web.Response(status=404)
         return await verify_and_handle_mc(request)
 
+    async def mc_batch_handler(request: web.Request):
+        return await verify_and_handle_mc_batch(request)
+
     app = web.Application()
-    routes = [web.get("/healthz", handle_health), web.post("/github", github_webhook_handler)]
+    routes = [web.get("/healthz", handle_health)]
+    if verify_and_handle_github is not None:
+        routes.append(web.post("/github", github_webhook_handler))
     if verify_and_handle_mc is not None:
         routes.append(web.post("/mc", mc_webhook_handler))
+    if verify_and_handle_mc_batch is not None:
+        routes.append(web.post("/mc/batch", mc_batch_handler))
+    if mc_ws_handler is not None:
+        routes.append(web.get("/mc/ws", mc_ws_handler))
     app.add_routes(routes)
     runner = web.AppRunner(app)
     await runner.setup()
     port = int(cfg.get("PORT") or 8080)
     site = web.TCPSite(runner, "0.0.0.0", port)
-    await site.start()
-    logger.info("Webhook Server listening on :%d", port)
+    try:
+        await site.start()
+        logger.info("Webhook Server listening on :%d", port)
+        # Job bleibt aktiv, damit der Supervisor den Server als laufend führt
+        while not bot.is_closed():
+            _heartbeat(cfg)
+            await _sleep(cfg, 60)
+    finally:
+        await runner.cleanup()
 
 
 def parse_iso_to_aware_dt(dt_module_datetime, iso_str: str, tz_name: str) -> datetime:
@@ -130,19 +176,21 @@ def format_time_delta(delta: timedelta) -> str:
     return f"{minutes} Min" if minutes > 0 else "0 Min"
 
 
-async def countdown_task(bot, logger, cfg, parse_iso_to_dt, fmt_td, get_last_msg_id, set_last_msg_id, get_timer_message_sent=None, set_timer_message_sent=None):
+async def countdown_task(bot, logger, cfg, parse_iso_to_dt, fmt_td, ephemeral, get_timer_message_sent=None, set_timer_message_sent=None):
+    _last_sent_slot = None
     await bot.wait_until_ready()
     while not bot.is_closed():
+        _heartbeat(cfg)
         try:
             if not cfg["COUNTDOWN_CHANNEL_ID_INT"] or not cfg["COUNTDOWN_TARGET_ISO"]:
-                await asyncio.sleep(300)
+                await _sleep(cfg, 300)
                 continue
             channel = bot.get_channel(cfg["COUNTDOWN_CHANNEL_ID_INT"])
             if channel is None:
                 try:
                     channel = await bot.fetch_channel(cfg["COUNTDOWN_CHANNEL_ID_INT"])
                 except Exception:
-                    await asyncio.sleep(300)
+                    await _sleep(cfg, 300)
                     continue
             tz = ZoneInfo(cfg["COUNTDOWN_TZ"])
             now = datetime.now(tz)
@@ -161,7 +209,7 @@ async def countdown_task(bot, logger, cfg, parse_iso_to_dt, fmt_td, get_last_msg
                             logger.info("Timer-Nachricht wurde gesendet")
                         except Exception as exc:
                             logger.warning("Fehler beim Senden der Timer-Nachricht: %s", exc)
-                await asyncio.sleep(600)
+                await _sleep(cfg, 600)
                 continue
 
             send_now = False
@@ -209,17 +257,11 @@ async def countdown_task(bot, logger, cfg, parse_iso_to_dt, fmt_td, get_last_msg
                     message = f"Es sind noch {weeks_left} Wochen bis zum Serverstart verbleibend."
                     send_now = True
 
-            if send_now and message:
+            # Vorzeitiges Aufwecken (Konfig-Änderung) darf dieselbe Minute nicht doppelt senden
+            slot = (message, now.strftime("%Y-%m-%dT%H:%M"))
+            if send_now and message and slot != _last_sent_slot:
+                _last_sent_slot = slot
                 try:
-                    # Vorherige Bot-Countdown-Nachricht löschen
-                    last_id = get_last_msg_id()
-                    if last_id:
-                        try:
-                            old = await channel.fetch_message(last_id)
-                            if old and old.author == bot.user:
-                                await old.delete()
-                        except Exception:
-                            pass
                     role_id = cfg.get("COUNTDOWN_ROLE_ID_INT")
                     if role_id:
                         try:
@@ -232,10 +274,11 @@ async def countdown_task(bot, logger, cfg, parse_iso_to_dt, fmt_td, get_last_msg
                     else:
                         message_to_send = message
                     sent = await channel.send(message_to_send)
-                    set_last_msg_id(sent.id)
+                    # Vorherige automatische Countdown-Nachricht wird dadurch gelöscht
+                    ephemeral.track(channel.id, sent.id, kind="countdown_auto")
                 except Exception:
                     pass
         except Exception as exc:
             logger.warning("Countdown Fehler: %s", exc)
-        await asyncio.sleep(60)
+        await _sleep(cfg, 60)
 
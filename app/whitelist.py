@@ -0,0 +1,211 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import time
+
+from app.rcon import PRIORITY_ADMIN, PRIORITY_SYSTEM
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_]{3,16}$")
+WHITELIST_LIST_RE = re.compile(r"There (?:are|is) (?P<num>\d+|no) whitelisted players?(?::\s*(?P<names>.*))?", re.IGNORECASE | re.DOTALL)
+HEADER_NAMES = {"name", "names", "player", "players", "username", "spieler"}
+
+IMPORT_BATCH_SIZE = 25
+MAX_IMPORT_NAMES = 1000
+
+
+def is_valid_name(name: str) -> bool:
+    return bool(NAME_RE.match(name or ""))
+
+
+def parse_name_list(text: str):
+    # CSV (erste Spalte) oder Zeilenliste → (gültige Namen ohne Duplikate, ungültige, Duplikate)
+    valid, invalid, seen = [], [], set()
+    duplicates = 0
+    rows = [row for row in csv.reader(io.StringIO(text), delimiter=";" if ";" in text and "," not in text else ",") if any(c.strip() for c in row)]
+    for index, row in enumerate(rows):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if len(rows) == 1:
+            # Einzeilige Liste "a, b, c"
+            tokens = [token for cell in cells for token in cell.split()]
+        elif len(cells) == 1:
+            # Zeilenliste; mehrere Namen per Leerzeichen erlaubt
+            tokens = cells[0].split()
+        else:
+            # CSV: Name steht in der ersten Spalte
+            tokens = [cells[0]]
+        for token in tokens:
+            if index == 0 and token.lower() in HEADER_NAMES:
+                continue
+            if not is_valid_name(token):
+                invalid.append(token)
+                continue
+            key = token.lower()
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            valid.append(token)
+    return valid, invalid, duplicates
+
+
+def parse_whitelist_response(response: str):
+    # Antwort von "whitelist list" → Liste der Namen oder None, wenn unbekanntes Format
+    match = WHITELIST_LIST_RE.search(response or "")
+    if not match:
+        return None
+    if match.group("num").lower() == "no" or not match.group("names"):
+        return []
+    return [n.strip() for n in match.group("names").split(",") if n.strip()]
+
+
+def classify_add_response(response: str) -> str:
+    text = (response or "").lower()
+    if "added" in text:
+        return "added"
+    if "already" in text:
+        return "present"
+    return "failed"
+
+
+def _add_batch(names):
+    # Läuft im RCON-Worker: alle Adds eines Batches über dieselbe Verbindung
+    def run(client):
+        results = {}
+        for name in names:
+            try:
+                results[name] = classify_add_response(client.run("whitelist add " + name))
+            except Exception:
+                results[name] = "failed"
+                break
+        return results
+    return run
+
+
+async def fetch_whitelist(rcon, priority: int = PRIORITY_ADMIN):
+    response = await rcon.run(priority, lambda client: client.run("whitelist list"))
+    return parse_whitelist_response(response)
+
+
+async def import_whitelist(rcon, names, cache=None):
+    # Diff gegen aktuelle Whitelist (Cache, sonst RCON), dann nur fehlende Namen in Batches hinzufügen
+    if cache is not None and cache.is_synced():
+        current = cache.names()
+    else:
+        current = await fetch_whitelist(rcon)
+        if current is None:
+            # Antwort nicht erkannt: nur gegen leere Liste diffen, Cache gilt weiter als nicht synchron
+            current = []
+        elif cache is not None:
+            cache.replace_all(current)
+    present_keys = {n.lower() for n in current}
+    summary = {"added": [], "present": [], "failed": []}
+    missing = []
+    for name in names:
+        if name.lower() in present_keys:
+            summary["present"].append(name)
+        else:
+            missing.append(name)
+    for start in range(0, len(missing), IMPORT_BATCH_SIZE):
+        batch = missing[start:start + IMPORT_BATCH_SIZE]
+        try:
+            results = await rcon.run(PRIORITY_ADMIN, _add_batch(batch), timeout=10.0 + len(batch))
+        except Exception:
+            results = {}
+        for name in batch:
+            summary[results.get(name, "failed")].append(name)
+    if cache is not None:
+        for name in summary["added"] + summary["present"]:
+            cache.add(name)
+        await cache.persist()
+    return summary
+
+
+class WhitelistCache:
+    # Lokale Kopie der Server-Whitelist (Speicher + Datei) für Abfragen ohne RCON-Roundtrip
+
+    def __init__(self, path: str):
+        self._path = path
+        self._names = {}  # name.lower() → Anzeigename
+        self.last_sync = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self._path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._names = {n.lower(): n for n in data.get("names", []) if isinstance(n, str)}
+            self.last_sync = data.get("last_sync")
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self._names = {}
+
+    def _save(self, payload: dict) -> None:
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False)
+        os.replace(tmp, self._path)
+
+    async def persist(self) -> None:
+        payload = {"names": self.names(), "last_sync": self.last_sync}
+        await asyncio.to_thread(self._save, payload)
+
+    async def reload(self) -> None:
+        # Nicht-Primärprozesse: Sync läuft im Primärprozess, hier nur dessen Datei nachladen
+        fresh = await asyncio.to_thread(WhitelistCache, self._path)
+        self._names, self.last_sync = fresh._names, fresh.last_sync
+
+    def is_synced(self) -> bool:
+        return self.last_sync is not None
+
+    def contains(self, name: str) -> bool:
+        return (name or "").lower() in self._names
+
+    def names(self) -> list:
+        return sorted(self._names.values(), key=str.lower)
+
+    def add(self, name: str) -> None:
+        self._names[name.lower()] = name
+
+    def remove(self, name: str) -> None:
+        self._names.pop(name.lower(), None)
+
+    def replace_all(self, names) -> None:
+        self._names = {n.lower(): n for n in names}
+        self.last_sync = time.time()
+
+    async def refresh(self, rcon, priority: int = PRIORITY_SYSTEM) -> bool:
+        names = await fetch_whitelist(rcon, priority)
+        if names is None:
+            return False
+        self.replace_all(names)
+        await self.persist()
+        return True
+
+
+async def add_to_whitelist(rcon, cache, name: str, priority: int = PRIORITY_ADMIN) -> str:
+    # "added", "present" oder "failed"; Duplikate werden ohne RCON-Befehl erkannt
+    if cache is not None and cache.contains(name):
+        return "present"
+    result = classify_add_response(await rcon.run(priority, lambda client: client.run("whitelist add " + name)))
+    if cache is not None and result in ("added", "present"):
+        cache.add(name)
+        await cache.persist()
+    return result
+
+
+async def whitelist_sync_task(bot, logger, cfg, cache: WhitelistCache, rcon):
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        beat = cfg.get("HEARTBEAT")
+        if beat:
+            beat()
+        try:
+            if not await cache.refresh(rcon, PRIORITY_SYSTEM):
+                logger.warning("Whitelist-Antwort nicht erkannt, Cache unverändert")
+        except Exception as exc:
+            logger.debug("Whitelist-Sync fehlgeschlagen: %s", exc)
+        await asyncio.sleep(cfg["WHITELIST_SYNC_SECONDS"])
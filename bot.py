@@ -13,8 +13,37 @@ import aiohttp
 import logging
 import json
 import random
+import socket
+import contextvars
 from typing import Optional
-from app.settings import load_config, save_config
+from app.settings import load_config, update_config
+from app.supervisor import TaskSupervisor
+from app.live_config import LiveConfig
+from app.logtail import log_tail_task as task_log_tail
+from app.breaker import CircuitBreaker
+from app.chat_webhooks import WebhookPool
+from app.ephemeral import EphemeralMessages
+from app.archive import ChatArchive
+from app.stats import PlayerStats
+from app.status_embed import StatusBoard
+from app.recorder import TrafficRecorder
+from app.shards import ShardMetrics, parse_shard_ids, shard_label
+from app.echo import EchoFilter, TO_DISCORD, TO_MINECRAFT
+from app.mod_link import ModLink
+from app.ingress import (
+    ingress_listener_task as task_ingress_listener,
+    ingress_workers_task as task_ingress_workers,
+    parse_github_request as ingress_parse_github,
+    parse_mc_request as ingress_parse_mc,
+    parse_mc_batch_request as ingress_parse_mc_batch,
+    batch_response as ingress_batch_response,
+    status_response as ingress_status_response,
+)
+from app.rcon import RconScheduler, PRIORITY_SYSTEM
+from app.whitelist import WhitelistCache, add_to_whitelist, whitelist_sync_task as task_whitelist_sync
+from app.journal import BridgeJournal, DeliveryRejected, DIRECTION_DISCORD, DIRECTION_MINECRAFT
+from app.presence import PresenceTracker, presence_reconcile_task as task_presence_reconcile, parse_rcon_list
+from app.dispatch import build_dispatch_table, prefixes_for, route_message, ROUTE_COMMAND
 from app.tasks import (
     github_updates_task as task_github_updates,
     message_cleanup_task as task_cleanup,
@@ -47,6 +76,35 @@ SUPABASE_TABLE = os.getenv("SUPABASE_TABLE", "bot_config")
 MESSAGE_CLEANUP_RETENTION_HOURS = os.getenv("MESSAGE_CLEANUP_RETENTION_HOURS", "48")
 MESSAGE_CLEANUP_INTERVAL_MINUTES = os.getenv("MESSAGE_CLEANUP_INTERVAL_MINUTES", "60")
 DEFAULT_TIMEZONE = os.getenv("TIMEZONE", "Europe/Berlin")
+MC_LOG_PATH = os.getenv("MC_LOG_PATH")  # z.B. "/srv/minecraft/logs/latest.log"
+MC_LOG_OFFSET_PATH = os.getenv("MC_LOG_OFFSET_PATH", "mc_log_offset.json")
+MC_LOG_POLL_SECONDS = os.getenv("MC_LOG_POLL_SECONDS", "1")
+PRESENCE_RECONCILE_SECONDS = os.getenv("PRESENCE_RECONCILE_SECONDS", "300")
+WHITELIST_CACHE_PATH = os.getenv("WHITELIST_CACHE_PATH", "whitelist_cache.json")
+WHITELIST_SYNC_SECONDS = os.getenv("WHITELIST_SYNC_SECONDS", "600")
+BRIDGE_JOURNAL_PATH = os.getenv("BRIDGE_JOURNAL_PATH", "bridge_journal.sqlite3")  # leer = deaktiviert
+BRIDGE_JOURNAL_RETENTION_HOURS = os.getenv("BRIDGE_JOURNAL_RETENTION_HOURS", "24")
+BREAKER_FAILURE_THRESHOLD = os.getenv("BREAKER_FAILURE_THRESHOLD", "3")
+BREAKER_RESET_SECONDS = os.getenv("BREAKER_RESET_SECONDS", "30")
+HTTP_INGRESS_MODE = os.getenv("HTTP_INGRESS_MODE", "inline")  # "inline" oder "worker"
+INGRESS_WORKERS = os.getenv("INGRESS_WORKERS", "2")
+INGRESS_SOCKET_PATH = os.getenv("INGRESS_SOCKET_PATH", "ingress.sock")
+CHAT_ARCHIVE_PATH = os.getenv("CHAT_ARCHIVE_PATH", "chat_archive.sqlite3")  # leer = deaktiviert
+CHAT_ARCHIVE_RETENTION_DAYS = os.getenv("CHAT_ARCHIVE_RETENTION_DAYS", "365")  # 0 = unbegrenzt
+PLAYER_STATS_PATH = os.getenv("PLAYER_STATS_PATH", "player_stats.json")
+PLAYER_STATS_CHECKPOINT_SECONDS = os.getenv("PLAYER_STATS_CHECKPOINT_SECONDS", "60")
+STATUS_CHANNEL_ID = os.getenv("STATUS_CHANNEL_ID")  # Channel für das angepinnte Status-Embed
+STATUS_REFRESH_SECONDS = os.getenv("STATUS_REFRESH_SECONDS", "60")
+MC_CHAT_WEBHOOKS = os.getenv("MC_CHAT_WEBHOOKS", "0")  # Anzahl Channel-Webhooks für MC-Chat, 0 = aus
+MC_AVATAR_CACHE_PATH = os.getenv("MC_AVATAR_CACHE_PATH", "mc_avatar_cache.json")
+RECORD_PATH = os.getenv("RECORD_PATH")  # Traffic-Aufzeichnung (NDJSON) für app.replay, leer = aus
+SHARD_COUNT = os.getenv("SHARD_COUNT")  # leer = ohne Sharding, "auto" = Discord-Empfehlung, sonst Anzahl
+SHARD_IDS = os.getenv("SHARD_IDS")  # Shards dieses Prozesses, z. B. "0-3" oder "4,5"; leer = alle
+CLUSTER_PRIMARY = os.getenv("CLUSTER_PRIMARY")  # "1"/"0" überschreibt die Wahl des Primärprozesses
+CONFIG_RELOAD_SECONDS = os.getenv("CONFIG_RELOAD_SECONDS", "30")
+ECHO_TTL_SECONDS = os.getenv("ECHO_TTL_SECONDS", "15")  # Echo-Schutz der Brücke, 0 = aus
+MC_WEBHOOK_SECRET = os.getenv("MC_WEBHOOK_SECRET")
+MC_WS_RESUME_SECONDS = os.getenv("MC_WS_RESUME_SECONDS", "60")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("betterMCbot")
@@ -73,63 +131,205 @@ CHAT_CHANNEL_ID_INT = _parse_int(CHAT_CHANNEL_ID)
 GITHUB_UPDATES_CHANNEL_ID_INT = _parse_int(GITHUB_UPDATES_CHANNEL_ID)
 GITHUB_POLL_INTERVAL = _parse_int(GITHUB_POLL_INTERVAL_SECONDS) or 120
 WEBHOOK_ACTIVE = bool(GITHUB_WEBHOOK_SECRET)
+INGRESS_WORKER_MODE = HTTP_INGRESS_MODE.strip().lower() == "worker"
 MESSAGE_CLEANUP_RETENTION_HOURS_INT = _parse_int(MESSAGE_CLEANUP_RETENTION_HOURS) or 48
 MESSAGE_CLEANUP_INTERVAL_MINUTES_INT = _parse_int(MESSAGE_CLEANUP_INTERVAL_MINUTES) or 60
+MC_LOG_POLL_SECONDS_INT = _parse_int(MC_LOG_POLL_SECONDS) or 1
+PRESENCE_RECONCILE_SECONDS_INT = _parse_int(PRESENCE_RECONCILE_SECONDS) or 300
+WHITELIST_SYNC_SECONDS_INT = _parse_int(WHITELIST_SYNC_SECONDS) or 600
+STATUS_CHANNEL_ID_INT = _parse_int(STATUS_CHANNEL_ID)
+
+# Sharding: mehrere Gateway-Verbindungen, optional auf mehrere Prozesse verteilt (SHARD_IDS)
+try:
+    SHARD_IDS_LIST = parse_shard_ids(SHARD_IDS)
+except ValueError:
+    raise SystemExit(f"Ungültige SHARD_IDS: {SHARD_IDS}")
+SHARD_COUNT_INT = _parse_int(SHARD_COUNT)
+SHARDED = bool((SHARD_COUNT or "").strip()) or SHARD_IDS_LIST is not None
+if SHARD_IDS_LIST is not None and not SHARD_COUNT_INT:
+    raise SystemExit("SHARD_IDS braucht SHARD_COUNT (Gesamtzahl der Shards)")
+# Der Primärprozess (Standard: der mit Shard 0) führt die clusterweit einmaligen Jobs aus
+if CLUSTER_PRIMARY:
+    IS_PRIMARY = CLUSTER_PRIMARY.strip() == "1"
+else:
+    IS_PRIMARY = SHARD_IDS_LIST is None or 0 in SHARD_IDS_LIST
+
+def _process_path(path):
+    # Prozesslokale Dateien (Journal, Aufzeichnung) dürfen sich zwischen Prozessen nicht überschneiden
+    if not path or IS_PRIMARY or SHARD_IDS_LIST is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard_label(SHARD_IDS_LIST)}{ext}"
 
 # Countdown-Konfiguration
 COUNTDOWN_CHANNEL_ID_INT = None
 COUNTDOWN_TARGET_ISO = None  # ISO-String ohne/mit TZ; naive wird in COUNTDOWN_TZ interpretiert
 COUNTDOWN_TZ = DEFAULT_TIMEZONE
 COUNTDOWN_LAST_EVENT_ID = None
-COUNTDOWN_LAST_MESSAGE_ID = None
-COUNTDOWN_LAST_AUTO_MESSAGE_ID = None
-COUNTDOWN_LAST_TRIGGER_ID = None
 COUNTDOWN_ROLE_ID_INT = None
 COUNTDOWN_TIMER_MESSAGE = None  # Nachricht, die beim Timer-Ablauf gesendet wird
 COUNTDOWN_TIMER_MESSAGE_SENT = False  # Flag, ob die Nachricht bereits gesendet wurde
 
 HAS_RCON = bool(SERVER_IP and RCON_PASSWORD and RCON_PORT_INT)
 HAS_QUERY = bool(SERVER_IP and QUERY_PORT_INT)
-HAS_BRIDGE = bool(HAS_RCON and CHAT_CHANNEL_ID_INT)
+# WebSocket zur Mod (/mc/ws) gibt es nur im Inline-Modus; damit läuft die Brücke auch ohne RCON
+HAS_MOD_LINK = bool(MC_WEBHOOK_SECRET) and not INGRESS_WORKER_MODE
+HAS_BRIDGE = bool((HAS_RCON or HAS_MOD_LINK) and CHAT_CHANNEL_ID_INT)
 HAS_GITHUB = bool(GITHUB_REPO and GITHUB_UPDATES_CHANNEL_ID_INT)
 
 _last_seen_commit_sha = None
- 
+
+# Optional: eingehenden Verkehr und RCON-/Query-Antworten für Replays aufzeichnen
+RECORDER = TrafficRecorder(_process_path(RECORD_PATH), logging.getLogger("betterMCbot.recorder")) if RECORD_PATH else None
+
+def _rcon_client():
+    client = Client(SERVER_IP, RCON_PORT_INT, passwd=RCON_PASSWORD, timeout=5)
+    return RECORDER.wrap_rcon(client) if RECORDER is not None else client
+
+# Alle RCON-Befehle laufen über einen Scheduler (admin > system > chat) mit einer Verbindung
+# Circuit Breaker: bei Server-Neustart sofort scheitern statt jedes Mal den Timeout abzuwarten
+RCON_BREAKER = CircuitBreaker(
+    "rcon",
+    logging.getLogger("betterMCbot.breaker"),
+    failure_threshold=_parse_int(BREAKER_FAILURE_THRESHOLD) or 3,
+    reset_timeout=_parse_int(BREAKER_RESET_SECONDS) or 30,
+)
+QUERY_BREAKER = CircuitBreaker(
+    "query",
+    logging.getLogger("betterMCbot.breaker"),
+    failure_threshold=_parse_int(BREAKER_FAILURE_THRESHOLD) or 3,
+    reset_timeout=_parse_int(BREAKER_RESET_SECONDS) or 30,
+)
+RCON = RconScheduler(
+    _rcon_client,
+    logging.getLogger("betterMCbot.rcon"),
+    breaker=RCON_BREAKER,
+)
+
+# Lokale Kopie der Server-Whitelist (periodisch per RCON synchronisiert)
+WHITELIST = WhitelistCache(WHITELIST_CACHE_PATH)
+
+# Outbox für Brücken-Nachrichten: überlebt RCON-/Discord-Ausfälle und Neustarts
+JOURNAL = None
+if BRIDGE_JOURNAL_PATH:
+    try:
+        JOURNAL = BridgeJournal(
+            _process_path(BRIDGE_JOURNAL_PATH),
+            logging.getLogger("betterMCbot.journal"),
+            retention_hours=_parse_int(BRIDGE_JOURNAL_RETENTION_HOURS) or 24,
+        )
+    except Exception as exc:
+        logger.warning("Bridge-Journal konnte nicht geöffnet werden, sende direkt: %s", exc)
+
+# Durchsuchbares Archiv aller Brücken-Nachrichten (überdauert das Auto-Cleanup)
+ARCHIVE = None
+if CHAT_ARCHIVE_PATH:
+    try:
+        _retention_days = _parse_int(CHAT_ARCHIVE_RETENTION_DAYS)
+        ARCHIVE = ChatArchive(
+            CHAT_ARCHIVE_PATH,
+            logging.getLogger("betterMCbot.archive"),
+            retention_days=365 if _retention_days is None else _retention_days,
+        )
+    except Exception as exc:
+        logger.warning("Chat-Archiv konnte nicht geöffnet werden: %s", exc)
+
+# MC-Chat optional über Channel-Webhooks mit Spielername/Avatar (eigene Rate-Limits je Webhook)
+CHAT_WEBHOOKS = None
+if (_parse_int(MC_CHAT_WEBHOOKS) or 0) > 0:
+    CHAT_WEBHOOKS = WebhookPool(_parse_int(MC_CHAT_WEBHOOKS), MC_AVATAR_CACHE_PATH, logging.getLogger("betterMCbot.webhooks"))
+
+# Spielerstatistik (Tode/Ursachen, Joins, Chat, Spielzeit), periodisch gespeichert
+STATS = PlayerStats(
+    PLAYER_STATS_PATH,
+    logging.getLogger("betterMCbot.stats"),
+    checkpoint_seconds=_parse_int(PLAYER_STATS_CHECKPOINT_SECONDS) or 60,
+)
+
+# Echo-/Loop-Schutz: eigene Nachrichten, die als Chat-Event zurückkommen, nicht erneut spiegeln
+_echo_ttl = _parse_int(ECHO_TTL_SECONDS)
+ECHO = EchoFilter(ttl_seconds=15 if _echo_ttl is None else _echo_ttl) if _echo_ttl != 0 else None
+
+# WebSocket zur Server-Mod (/mc/ws): Events und Chat über eine Verbindung, RCON bleibt Fallback
+MOD_LINK = None
+if HAS_MOD_LINK:
+    MOD_LINK = ModLink(
+        MC_WEBHOOK_SECRET,
+        logging.getLogger("betterMCbot.modlink"),
+        lambda event: _recorded("ws", handle_mc_event)(event),
+        lambda text: _say_via_rcon(text),
+        resume_seconds=_parse_int(MC_WS_RESUME_SECONDS) or 60,
+    )
+
+# Online-Spieler aus join/leave-Events, periodisch per Query/RCON abgeglichen
+PRESENCE = PresenceTracker(
+    on_session_end=lambda name, seconds: STATS.record_playtime(name, seconds),
+    on_change=lambda: STATUS_BOARD.notify(),
+)
+
+# Angepinntes Status-Embed; wird nur bei geändertem Inhalt editiert
+def _save_status_message_id(mid):
+    update_config({"status_message_id": mid})
+
+STATUS_BOARD = StatusBoard(
+    logging.getLogger("betterMCbot.status"),
+    PRESENCE,
+    query_stats=(lambda full: _query_stats(full)) if HAS_QUERY else None,
+    persist_message_id=_save_status_message_id,
+    message_id=_parse_int(str(load_config().get("status_message_id") or "")),
+    refresh_seconds=_parse_int(STATUS_REFRESH_SECONDS) or 60,
+)
+
+# Hintergrundjobs laufen als Singletons; on_ready feuert nach jedem Reconnect erneut
+SUPERVISOR = TaskSupervisor(logging.getLogger("betterMCbot.jobs"))
+_COMMANDS_REGISTERED = False
+
+# Gesetzt während eines /mc/batch-Durchlaufs: Discord-Nachrichten sammeln statt einzeln senden
+_DISCORD_BATCH = contextvars.ContextVar("discord_batch", default=None)
+DISCORD_MESSAGE_LIMIT = 2000
 
 # Dynamisches Prefix (per Slash-Command änderbar)
 COMMAND_PREFIX = "mc!"
 
+# Vorberechnete Dispatch-Tabelle für on_message (wird bei Konfig-Änderungen neu gebaut)
+DISPATCH_TABLE = build_dispatch_table(COMMAND_PREFIX, [CHAT_CHANNEL_ID_INT], HAS_BRIDGE)
+
+def _rebuild_dispatch_table():
+    global DISPATCH_TABLE
+    DISPATCH_TABLE = build_dispatch_table(COMMAND_PREFIX, [CHAT_CHANNEL_ID_INT], HAS_BRIDGE)
+
 def get_command_prefix(_bot, message):
-    # Global dynamisches Prefix (z. B. "mc!")
-    prefixes = [COMMAND_PREFIX]
-    # Im Mirror-Channel zusätzlich das klassische "-" erlauben
+    # Global dynamisches Prefix (z. B. "mc!"), im Mirror-Channel zusätzlich "-"
     try:
-        if CHAT_CHANNEL_ID_INT and message and message.channel and message.channel.id == CHAT_CHANNEL_ID_INT:
-            prefixes.append("-")
+        return list(prefixes_for(DISPATCH_TABLE, message.channel.id))
     except Exception:
-        pass
-    return prefixes
+        return [COMMAND_PREFIX]
 
- 
 
 def _apply_runtime_config(data):
     global CHAT_CHANNEL_ID_INT, GITHUB_REPO, GITHUB_UPDATES_CHANNEL_ID_INT, GITHUB_POLL_INTERVAL
     global HAS_BRIDGE, HAS_GITHUB
     global COMMAND_PREFIX
-    global COUNTDOWN_CHANNEL_ID_INT, COUNTDOWN_TARGET_ISO, COUNTDOWN_TZ, COUNTDOWN_LAST_EVENT_ID, COUNTDOWN_LAST_MESSAGE_ID, COUNTDOWN_LAST_AUTO_MESSAGE_ID, COUNTDOWN_LAST_TRIGGER_ID, COUNTDOWN_ROLE_ID_INT
+    global COUNTDOWN_CHANNEL_ID_INT, COUNTDOWN_TARGET_ISO, COUNTDOWN_TZ, COUNTDOWN_LAST_EVENT_ID, COUNTDOWN_ROLE_ID_INT
     global COUNTDOWN_TIMER_MESSAGE, COUNTDOWN_TIMER_MESSAGE_SENT
+    global STATUS_CHANNEL_ID_INT
 
     chat_id = _parse_int(data.get("chat_channel_id"))
     if chat_id is not None:
         CHAT_CHANNEL_ID_INT = chat_id
 
+    # Fehlende Schlüssel (z. B. nach /disable_github) fallen wie beim Neustart auf ENV zurück
     repo = data.get("github_repo")
     if isinstance(repo, str) and repo.strip():
         GITHUB_REPO = repo.strip()
+    else:
+        GITHUB_REPO = os.getenv("GITHUB_REPO")
 
     gh_channel = _parse_int(data.get("github_updates_channel_id"))
     if gh_channel is not None:
         GITHUB_UPDATES_CHANNEL_ID_INT = gh_channel
+    else:
+        GITHUB_UPDATES_CHANNEL_ID_INT = _parse_int(os.getenv("GITHUB_UPDATES_CHANNEL_ID"))
 
     poll_int = _parse_int(str(data.get("github_poll_interval_seconds")))
     if poll_int:
@@ -150,17 +350,14 @@ def _apply_runtime_config(data):
         MESSAGE_CLEANUP_INTERVAL_MINUTES_INT = interval_cfg
 
     # Countdown
-    cd_channel = _parse_int(data.get("countdown_channel_id"))
-    if cd_channel is not None:
-        COUNTDOWN_CHANNEL_ID_INT = cd_channel
+    COUNTDOWN_CHANNEL_ID_INT = _parse_int(data.get("countdown_channel_id"))
     cd_target = data.get("countdown_target_iso")
     if isinstance(cd_target, str) and cd_target:
         COUNTDOWN_TARGET_ISO = cd_target.strip()
     else:
         # Fallback auf ENV (für Erststart), falls vorhanden
         env_target = os.getenv("COUNTDOWN_TARGET_ISO")
-        if env_target:
-            COUNTDOWN_TARGET_ISO = env_target.strip()
+        COUNTDOWN_TARGET_ISO = env_target.strip() if env_target else None
     cd_tz = data.get("countdown_timezone")
     if isinstance(cd_tz, str) and cd_tz:
         COUNTDOWN_TZ = cd_tz.strip()
@@ -169,25 +366,6 @@ def _apply_runtime_config(data):
     last_id = data.get("countdown_last_event_id")
     if isinstance(last_id, str) and last_id:
         COUNTDOWN_LAST_EVENT_ID = last_id
-    last_msg_id = data.get("countdown_last_message_id")
-    if last_msg_id is not None:
-        try:
-            COUNTDOWN_LAST_MESSAGE_ID = int(last_msg_id)
-        except Exception:
-            COUNTDOWN_LAST_MESSAGE_ID = None
-    last_auto_msg_id = data.get("countdown_last_auto_message_id")
-    if last_auto_msg_id is not None:
-        try:
-            COUNTDOWN_LAST_AUTO_MESSAGE_ID = int(last_auto_msg_id)
-        except Exception:
-            COUNTDOWN_LAST_AUTO_MESSAGE_ID = None
-    last_trig_id = data.get("countdown_last_trigger_id")
-    if last_trig_id is not None:
-        try:
-            COUNTDOWN_LAST_TRIGGER_ID = int(last_trig_id)
-        except Exception:
-            COUNTDOWN_LAST_TRIGGER_ID = None
-
     role_id = data.get("countdown_role_id")
     try:
         COUNTDOWN_ROLE_ID_INT = _parse_int(str(role_id)) if role_id is not None else None
@@ -204,11 +382,85 @@ def _apply_runtime_config(data):
     timer_msg_sent = data.get("countdown_timer_message_sent")
     COUNTDOWN_TIMER_MESSAGE_SENT = bool(timer_msg_sent) if timer_msg_sent is not None else False
 
-    HAS_BRIDGE = bool(HAS_RCON and CHAT_CHANNEL_ID_INT)
+    status_id = _parse_int(str(data.get("status_channel_id") or ""))
+    STATUS_CHANNEL_ID_INT = status_id if status_id is not None else _parse_int(STATUS_CHANNEL_ID)
+
+    HAS_BRIDGE = bool((HAS_RCON or HAS_MOD_LINK) and CHAT_CHANNEL_ID_INT)
     HAS_GITHUB = bool(GITHUB_REPO and GITHUB_UPDATES_CHANNEL_ID_INT)
+    _rebuild_dispatch_table()
+    _publish_live_config()
+
+
+# Live-Konfiguration: laufende Tasks und Commands sehen Änderungen sofort
+LIVE_CONFIG = LiveConfig()
+_COMMAND_DEPS = None
+
+def _runtime_values():
+    return {
+        "CHAT_CHANNEL_ID_INT": CHAT_CHANNEL_ID_INT,
+        "HAS_RCON": HAS_RCON,
+        "HAS_QUERY": HAS_QUERY,
+        "HAS_BRIDGE": HAS_BRIDGE,
+        "HAS_GITHUB": HAS_GITHUB,
+        "WEBHOOK_ACTIVE": WEBHOOK_ACTIVE,
+        "GITHUB_REPO": GITHUB_REPO,
+        "GITHUB_UPDATES_CHANNEL_ID_INT": GITHUB_UPDATES_CHANNEL_ID_INT,
+        "GITHUB_POLL_INTERVAL": GITHUB_POLL_INTERVAL,
+        "MESSAGE_CLEANUP_RETENTION_HOURS_INT": MESSAGE_CLEANUP_RETENTION_HOURS_INT,
+        "MESSAGE_CLEANUP_INTERVAL_MINUTES_INT": MESSAGE_CLEANUP_INTERVAL_MINUTES_INT,
+        "COUNTDOWN_CHANNEL_ID_INT": COUNTDOWN_CHANNEL_ID_INT,
+        "COUNTDOWN_TARGET_ISO": COUNTDOWN_TARGET_ISO,
+        "COUNTDOWN_TZ": COUNTDOWN_TZ,
+        "COUNTDOWN_ROLE_ID_INT": COUNTDOWN_ROLE_ID_INT,
+        "COUNTDOWN_TIMER_MESSAGE": COUNTDOWN_TIMER_MESSAGE,
+        "STATUS_CHANNEL_ID_INT": STATUS_CHANNEL_ID_INT,
+    }
+
+def _publish_live_config():
+    values = _runtime_values()
+    LIVE_CONFIG.publish(values)
+    # Commands halten das deps-Dict per Referenz → Werte in-place aktualisieren
+    if _COMMAND_DEPS is not None:
+        _COMMAND_DEPS.update({key: value for key, value in values.items() if key in _COMMAND_DEPS})
 
 _apply_runtime_config(load_config())
 
+if RECORDER is not None:
+    # Keine Secrets: nur was das Replay braucht, um denselben Zustand herzustellen
+    RECORDER.meta({
+        "config": load_config(),
+        "env": {"CHAT_CHANNEL_ID": CHAT_CHANNEL_ID, "GITHUB_REPO": GITHUB_REPO, "GITHUB_UPDATES_CHANNEL_ID": GITHUB_UPDATES_CHANNEL_ID, "TIMEZONE": DEFAULT_TIMEZONE},
+        "features": {"rcon": HAS_RCON, "query": HAS_QUERY, "mc_webhook": bool(os.getenv("MC_WEBHOOK_SECRET"))},
+    })
+
+
+_LEGACY_COUNTDOWN_KEYS = {
+    "countdown_last_message_id": "countdown_manual",
+    "countdown_last_auto_message_id": "countdown_auto",
+    "countdown_last_trigger_id": "countdown_trigger",
+}
+
+def _load_ephemeral_entries(data):
+    entries = list(data.get("ephemeral_messages") or [])
+    # Migration der alten Einzel-IDs; der Kanal manueller Antworten ist unbekannt → Countdown-Channel
+    if COUNTDOWN_CHANNEL_ID_INT:
+        for key, kind in _LEGACY_COUNTDOWN_KEYS.items():
+            mid = _parse_int(str(data.get(key) or ""))
+            if mid:
+                entries.append([COUNTDOWN_CHANNEL_ID_INT, mid, kind, None])
+    return entries
+
+def _persist_ephemeral(entries):
+    update_config({"ephemeral_messages": entries}, remove=_LEGACY_COUNTDOWN_KEYS)
+
+# Kurzlebige Bot-Nachrichten (Countdown-Antworten usw.): ein Timer löscht sie per ID
+# Nur der Primärprozess persistiert (gemeinsamer Konfig-Schlüssel); andere Prozesse löschen nur bis zum Neustart
+EPHEMERAL = EphemeralMessages(
+    logging.getLogger("betterMCbot.ephemeral"),
+    _persist_ephemeral if IS_PRIMARY else None,
+    _load_ephemeral_entries(load_config()) if IS_PRIMARY else None,
+)
+
 async def fetch_latest_commits(session, repo_full_name):
     url = f"https://api.github.com/repos/{repo_full_name}/commits"
     headers = {"Accept": "application/vnd.github+json"}
@@ -218,17 +470,544 @@ async def fetch_latest_commits(session, repo_full_name):
             raise RuntimeError(f"GitHub API {resp.status}: {text}")
         return await resp.json()
 
- 
+
+def _query_stats(full=True):
+    # Blockierend; läuft per asyncio.to_thread
+    QUERY_BREAKER.check()
+    try:
+        with QueryClient(SERVER_IP, QUERY_PORT_INT, timeout=3) as client:
+            status = client.stats(full=full)
+    except Exception as exc:
+        QUERY_BREAKER.record_failure(exc)
+        if RECORDER is not None:
+            RECORDER.query(full, error=exc)
+        raise
+    QUERY_BREAKER.record_success()
+    if RECORDER is not None:
+        RECORDER.query(full, status)
+    return status
+
+def _query_online_players():
+    status = _query_stats(full=True)
+    return list(status['players']), int(status['max_players'])
+
+def _probe_rcon():
+    # Nur TCP-Connect, kein Login: billig genug für wiederholte Proben
+    socket.create_connection((SERVER_IP, RCON_PORT_INT), timeout=3).close()
+
+def _probe_query():
+    with QueryClient(SERVER_IP, QUERY_PORT_INT, timeout=3) as client:
+        client.stats(full=False)
+
+def _health_status():
+    return {
+        "status": "ok",
+        "circuits": {
+            "rcon": RCON_BREAKER.status() if HAS_RCON else None,
+            "query": QUERY_BREAKER.status() if HAS_QUERY else None,
+        },
+        "rcon_queue": RCON.stats() if HAS_RCON else None,
+        "journal_pending": JOURNAL.pending() if JOURNAL is not None else None,
+        "echo": ECHO.status() if ECHO is not None else None,
+        "mod_link": MOD_LINK.status() if MOD_LINK is not None else None,
+        "jobs": {name: info["state"] for name, info in SUPERVISOR.status().items()},
+        "process": {"primary": IS_PRIMARY, "shard_ids": SHARD_IDS_LIST, "shard_count": bot.shard_count},
+        "shards": {str(shard_id): entry for shard_id, entry in SHARD_METRICS.snapshot(bot).items()},
+    }
+
+async def _fetch_online_players():
+    if HAS_QUERY:
+        return await asyncio.to_thread(_query_online_players)
+    if HAS_RCON:
+        return parse_rcon_list(await RCON.run(PRIORITY_SYSTEM, lambda client: client.run("list")))
+    return None, None
+
+
+async def _config_reload_task(heartbeat):
+    last = await asyncio.to_thread(load_config)
+    while True:
+        heartbeat()
+        await asyncio.sleep(_parse_int(CONFIG_RELOAD_SECONDS) or 30)
+        if not IS_PRIMARY:
+            # Whitelist-Cache und Statistik pflegt nur der Primärprozess → dessen Dateien nachladen
+            try:
+                await WHITELIST.reload()
+                await STATS.reload()
+            except Exception as exc:
+                logger.warning("Whitelist/Statistik konnten nicht nachgeladen werden: %s", exc)
+        try:
+            data = await asyncio.to_thread(load_config)
+        except Exception as exc:
+            logger.warning("Konfiguration konnte nicht neu geladen werden: %s", exc)
+            continue
+        if data != last:
+            last = data
+            _apply_runtime_config(data)
+
+async def _run_with_live_view(name, keys, runner):
+    view = LIVE_CONFIG.view(keys, {"HEARTBEAT": SUPERVISOR.heartbeat(name)})
+    try:
+        await runner(view)
+    finally:
+        LIVE_CONFIG.release(view)
+
+_GITHUB_KEYS = ("HAS_GITHUB", "WEBHOOK_ACTIVE", "GITHUB_POLL_INTERVAL", "GITHUB_UPDATES_CHANNEL_ID_INT", "GITHUB_REPO")
+_CLEANUP_KEYS = ("CHAT_CHANNEL_ID_INT", "MESSAGE_CLEANUP_RETENTION_HOURS_INT", "MESSAGE_CLEANUP_INTERVAL_MINUTES_INT")
+_COUNTDOWN_KEYS = ("COUNTDOWN_CHANNEL_ID_INT", "COUNTDOWN_TARGET_ISO", "COUNTDOWN_TZ", "COUNTDOWN_ROLE_ID_INT", "COUNTDOWN_TIMER_MESSAGE")
+
+def _background_jobs():
+    # name → (soll laufen?, Factory)
+    return {
+        # /mc/ws gibt es nur im Inline-Modus (Worker-Prozesse können nicht zurück zur Mod senden)
+        "web_server": (
+            (WEBHOOK_ACTIVE or MOD_LINK is not None) and not INGRESS_WORKER_MODE,
+            lambda: task_start_web(bot, logger, {
+                "PORT": os.getenv("PORT"),
+                "HEALTH": _health_status,
+                "HEARTBEAT": SUPERVISOR.heartbeat("web_server"),
+            }, verify_and_handle_github if WEBHOOK_ACTIVE else None, verify_and_handle_mc, verify_and_handle_mc_batch,
+                MOD_LINK.handle if MOD_LINK is not None else None),
+        ),
+        # Worker-Modus: HTTP, Signaturprüfung und JSON-Parsing in eigenen Prozessen
+        "ingress_listener": (
+            WEBHOOK_ACTIVE and INGRESS_WORKER_MODE,
+            lambda: task_ingress_listener(bot, logger, {
+                "INGRESS_SOCKET_PATH": INGRESS_SOCKET_PATH,
+                "HEARTBEAT": SUPERVISOR.heartbeat("ingress_listener"),
+            }, {"github": _recorded("github", handle_github_event), "mc": _recorded("mc", handle_mc_event),
+               "mc_batch": _recorded("mc_batch", _handle_ingress_mc_batch), "health": _handle_ingress_health}),
+        ),
+        "ingress_workers": (
+            WEBHOOK_ACTIVE and INGRESS_WORKER_MODE,
+            lambda: task_ingress_workers(bot, logger, {
+                "INGRESS_SOCKET_PATH": INGRESS_SOCKET_PATH,
+                "INGRESS_WORKERS": _parse_int(INGRESS_WORKERS) or 2,
+                "HEARTBEAT": SUPERVISOR.heartbeat("ingress_workers"),
+            }),
+        ),
+        "rcon": (
+            HAS_RCON,
+            lambda: RCON.serve(SUPERVISOR.heartbeat("rcon")),
+        ),
+        "breaker_rcon": (
+            HAS_RCON,
+            lambda: RCON_BREAKER.monitor(_probe_rcon, SUPERVISOR.heartbeat("breaker_rcon")),
+        ),
+        "breaker_query": (
+            HAS_QUERY,
+            lambda: QUERY_BREAKER.monitor(_probe_query, SUPERVISOR.heartbeat("breaker_query")),
+        ),
+        "status_board": (
+            bool(STATUS_CHANNEL_ID_INT),
+            lambda: _run_with_live_view("status_board", ("STATUS_CHANNEL_ID_INT",), lambda cfg: STATUS_BOARD.serve(bot, cfg)),
+        ),
+        # Verteilte Prozesse: Konfig-Änderungen anderer Prozesse (Slash-Commands) übernehmen
+        "config_reload": (
+            SHARD_IDS_LIST is not None or not IS_PRIMARY,
+            lambda: _config_reload_task(SUPERVISOR.heartbeat("config_reload")),
+        ),
+        "recorder": (
+            RECORDER is not None,
+            lambda: RECORDER.serve(SUPERVISOR.heartbeat("recorder")),
+        ),
+        "player_stats": (
+            True,
+            lambda: STATS.serve(SUPERVISOR.heartbeat("player_stats")),
+        ),
+        "chat_archive": (
+            ARCHIVE is not None,
+            lambda: ARCHIVE.serve(SUPERVISOR.heartbeat("chat_archive")),
+        ),
+        "journal_discord": (
+            JOURNAL is not None,
+            lambda: JOURNAL.serve(DIRECTION_DISCORD, _deliver_to_discord, SUPERVISOR.heartbeat("journal_discord")),
+        ),
+        "journal_minecraft": (
+            JOURNAL is not None and (HAS_RCON or MOD_LINK is not None),
+            lambda: JOURNAL.serve(DIRECTION_MINECRAFT, _deliver_to_minecraft, SUPERVISOR.heartbeat("journal_minecraft")),
+        ),
+        "whitelist_sync": (
+            HAS_RCON,
+            lambda: task_whitelist_sync(bot, logger, {
+                "WHITELIST_SYNC_SECONDS": WHITELIST_SYNC_SECONDS_INT,
+                "HEARTBEAT": SUPERVISOR.heartbeat("whitelist_sync"),
+            }, WHITELIST, RCON),
+        ),
+        "presence": (
+            HAS_QUERY or HAS_RCON,
+            lambda: task_presence_reconcile(bot, logger, {
+                "PRESENCE_RECONCILE_SECONDS": PRESENCE_RECONCILE_SECONDS_INT,
+                "HEARTBEAT": SUPERVISOR.heartbeat("presence"),
+            }, PRESENCE, _fetch_online_players),
+        ),
+        # Alternative MC→Discord-Quelle: Server-Log direkt mitlesen (kein HTTP pro Event)
+        "log_tail": (
+            bool(MC_LOG_PATH),
+            lambda: task_log_tail(bot, logger, {
+                "MC_LOG_PATH": MC_LOG_PATH,
+                "MC_LOG_OFFSET_PATH": MC_LOG_OFFSET_PATH,
+                "MC_LOG_POLL_SECONDS": MC_LOG_POLL_SECONDS_INT,
+                "HEARTBEAT": SUPERVISOR.heartbeat("log_tail"),
+            }, _recorded("log", handle_mc_event)),
+        ),
+        "github_updates": (
+            HAS_GITHUB and not WEBHOOK_ACTIVE,
+            lambda: _run_with_live_view("github_updates", _GITHUB_KEYS, lambda cfg: task_github_updates(bot, logger, fetch_latest_commits, cfg)),
+        ),
+        # Auto-Cleanup-Job (zentrale Implementierung aus app.tasks nutzen)
+        "message_cleanup": (
+            bool(CHAT_CHANNEL_ID_INT and (MESSAGE_CLEANUP_RETENTION_HOURS_INT or 0) > 0),
+            lambda: _run_with_live_view("message_cleanup", _CLEANUP_KEYS, lambda cfg: task_cleanup(bot, logger, cfg)),
+        ),
+        "ephemeral": (
+            True,
+            lambda: EPHEMERAL.serve(bot, SUPERVISOR.heartbeat("ephemeral")),
+        ),
+        "countdown": (
+            bool(COUNTDOWN_CHANNEL_ID_INT and COUNTDOWN_TARGET_ISO),
+            lambda: _run_with_live_view("countdown", _COUNTDOWN_KEYS, lambda cfg: task_countdown(
+                bot,
+                logger,
+                cfg,
+                task_parse_iso,
+                task_fmt_td,
+                EPHEMERAL,
+                lambda: COUNTDOWN_TIMER_MESSAGE_SENT,
+                lambda sent: _save_timer_message_sent_flag(sent)
+            )),
+        ),
+    }
+
+# Laufen clusterweit genau einmal (im Primärprozess); alle übrigen Jobs laufen in jedem Prozess
+_PRIMARY_ONLY_JOBS = {
+    "web_server", "ingress_listener", "ingress_workers", "status_board", "player_stats",
+    "whitelist_sync", "presence", "log_tail", "github_updates", "message_cleanup", "countdown",
+}
+
+def _sync_background_jobs():
+    # Startet/stoppt Jobs passend zur aktuellen Konfiguration (idempotent)
+    for name, (wanted, factory) in _background_jobs().items():
+        wanted = wanted and (IS_PRIMARY or name not in _PRIMARY_ONLY_JOBS)
+        if wanted:
+            SUPERVISOR.start(name, factory)
+        elif SUPERVISOR.is_running(name):
+            SUPERVISOR.cancel(name)
+            logger.info("Job %s gestoppt (Konfiguration)", name)
+
+def _on_live_config_change(changed):
+    if bot.is_ready():
+        _sync_background_jobs()
+
+LIVE_CONFIG.subscribe(_on_live_config_change)
+
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(description="Discord Chatbot", command_prefix=get_command_prefix, intents=intents)
+if SHARDED:
+    bot = commands.AutoShardedBot(
+        description="Discord Chatbot",
+        command_prefix=get_command_prefix,
+        intents=intents,
+        shard_count=SHARD_COUNT_INT,
+        shard_ids=SHARD_IDS_LIST,
+    )
+else:
+    bot = commands.Bot(description="Discord Chatbot", command_prefix=get_command_prefix, intents=intents)
+SHARD_METRICS = ShardMetrics()
+
+
+async def handle_github_event(event):
+    # Verarbeitet ein geprüftes, kompaktes GitHub-Event (siehe app.ingress.compact_github_event)
+    kind = event.get("event")
+    if kind not in ("push", "pull_request"):
+        return "ignored"
+    repo_full_name = event.get("repo")
+    if GITHUB_REPO and repo_full_name and GITHUB_REPO != repo_full_name:
+        return "ignored repo"
+    channel_id = GITHUB_UPDATES_CHANNEL_ID_INT
+    if not channel_id:
+        return "no channel configured"
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        try:
+            channel = await bot.fetch_channel(channel_id)
+        except Exception:
+            return "channel not found"
+    if kind == "push":
+        for c in event.get("commits") or []:
+            await channel.send(f"[GitHub] {c['author']}: {c['message']}\n{c['url']}")
+        return "ok"
+
+    action = event.get("action", "")
+    pr = event.get("pr") or {}
+    pr_number = pr.get("number", "?")
+    pr_title = pr.get("title", "Unbekannt")
+    pr_url = pr.get("html_url", "")
+    pr_user = pr.get("user", "?")
+
+    # Nachrichten für verschiedene PR-Aktionen
+    if action == "opened":
+        msg = f"🔔 **Neue Pull Request #{pr_number}** von **{pr_user}**\n**Titel:** {pr_title}\n{pr_url}"
+    elif action == "closed":
+        if pr.get("merged", False):
+            merged_by = pr.get("merged_by", "?")
+            msg = f"✅ **Pull Request #{pr_number} gemerged** von **{merged_by}**\n**Titel:** {pr_title}\n{pr_url}"
+        else:
+            msg = f"❌ **Pull Request #{pr_number} geschlossen** (nicht gemerged)\n**Titel:** {pr_title}\n{pr_url}"
+    elif action == "reopened":
+        msg = f"🔄 **Pull Request #{pr_number} wiedereröffnet** von **{pr_user}**\n**Titel:** {pr_title}\n{pr_url}"
+    elif action == "ready_for_review":
+        msg = f"👀 **Pull Request #{pr_number} ist bereit für Review**\n**Titel:** {pr_title}\n{pr_url}"
+    elif action == "review_requested":
+        requested_reviewer = event.get("requested_reviewer", "?")
+        msg = f"👥 **Review angefordert** für PR #{pr_number} von **{requested_reviewer}**\n**Titel:** {pr_title}\n{pr_url}"
+    else:
+        # Andere Aktionen ignorieren oder generisch behandeln
+        return f"ignored action: {action}"
+
+    await channel.send(msg)
+    return "ok"
+
+
+async def verify_and_handle_github(request):
+    event, error = await ingress_parse_github(request, GITHUB_WEBHOOK_SECRET)
+    if RECORDER is not None:
+        await RECORDER.http("github", request, error is None)
+    if error is not None:
+        return error
+    return ingress_status_response(await handle_github_event(event))
+
+
+async def verify_and_handle_mc(request):
+    event, error = await ingress_parse_mc(request, os.getenv("MC_WEBHOOK_SECRET"))
+    # 404 = MC-Webhook nicht konfiguriert, nichts aufzuzeichnen
+    if RECORDER is not None and (error is None or error.status != 404):
+        await RECORDER.http("mc", request, error is None)
+    if error is not None:
+        return error
+    return ingress_status_response(await handle_mc_event(event))
+
+
+async def verify_and_handle_mc_batch(request):
+    events, error = await ingress_parse_mc_batch(request, os.getenv("MC_WEBHOOK_SECRET"))
+    if RECORDER is not None and (error is None or error.status != 404):
+        await RECORDER.http("mc_batch", request, error is None)
+    if error is not None:
+        return error
+    return ingress_batch_response(await handle_mc_batch(events))
+
+
+async def _handle_ingress_mc_batch(event):
+    return json.dumps(await handle_mc_batch(event.get("events") or []))
+
+
+async def handle_mc_batch(events):
+    # Events in Reihenfolge verarbeiten; ihre Discord-Nachrichten gehen gebündelt raus
+    statuses = []
+    pending = []
+    token = _DISCORD_BATCH.set(pending)
+    try:
+        for event in events:
+            if event is None:
+                statuses.append("invalid json")
+                continue
+            try:
+                statuses.append(await handle_mc_event(event))
+            except Exception as exc:
+                logger.warning("Batch-Event konnte nicht verarbeitet werden: %s", exc)
+                statuses.append("error")
+    finally:
+        _DISCORD_BATCH.reset(token)
+    for payload in _coalesce_discord_payloads(pending):
+        await _enqueue_discord(payload)
+    return statuses
+
+
+def _coalesce_discord_payloads(payloads):
+    # Aufeinanderfolgende Nachrichten zu möglichst wenigen Discord-Nachrichten zusammenfassen;
+    # mit Webhooks nur solche desselben Spielers (Absender/Avatar bleiben erhalten)
+    merged = []
+    for payload in payloads:
+        if CHAT_WEBHOOKS is None:
+            payload = {"text": payload["text"]}
+        last = merged[-1] if merged else None
+        if last is not None and last.get("author") == payload.get("author"):
+            text = last["text"] + "\n" + payload["text"]
+            content = last["content"] + "\n" + payload["content"] if payload.get("author") else None
+            if len(text) <= DISCORD_MESSAGE_LIMIT and (content is None or len(content) <= DISCORD_MESSAGE_LIMIT):
+                last["text"] = text
+                if content is not None:
+                    last["content"] = content
+                continue
+        merged.append(dict(payload))
+    return merged
+
+
+async def _handle_ingress_health(event):
+    return json.dumps(_health_status())
+
+
+def _recorded(source, handler):
+    # Log-Tail/Ingress-Worker liefern schon kompakte Events; diese für app.replay mitschreiben
+    if RECORDER is None:
+        return handler
+
+    async def record_and_handle(event):
+        RECORDER.event(source, event)
+        return await handler(event)
+
+    return record_and_handle
+
+
+async def _deliver_to_discord(payload):
+    channel_id = CHAT_CHANNEL_ID_INT
+    if not channel_id:
+        raise RuntimeError("no mirror channel")
+    channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+    if ECHO is not None:
+        # Zeilenweise: gebündelte Batch-Nachrichten enthalten mehrere Brücken-Zeilen
+        for line in payload["text"].split("\n"):
+            ECHO.remember(TO_DISCORD, line)
+        if payload.get("author"):
+            # Webhook-Form "Spieler: Text", so wie eine fremde Bridge sie weiterreichen würde
+            for line in payload["content"].split("\n"):
+                ECHO.remember(TO_DISCORD, f"{payload['author']}: {line}")
+    try:
+        if CHAT_WEBHOOKS is not None and payload.get("author"):
+            if await CHAT_WEBHOOKS.send(channel, payload["author"], payload["content"]):
+                return
+        await channel.send(payload["text"])
+    except discord.HTTPException as exc:
+        # 4xx (außer Rate-Limit) wird sich durch Wiederholen nicht ändern
+        if 400 <= exc.status < 500 and exc.status not in (403, 429):
+            raise DeliveryRejected(str(exc))
+        raise
+
+
+async def _deliver_to_minecraft(payload):
+    if ECHO is not None:
+        ECHO.remember(TO_MINECRAFT, payload["text"])
+    if MOD_LINK is not None and await MOD_LINK.send_chat(payload["text"]):
+        return
+    await _say_via_rcon(payload["text"])
+
+
+async def _say_via_rcon(text):
+    if not HAS_RCON:
+        raise RuntimeError("RCON nicht konfiguriert")
+    await RCON.say(text)
+
+
+async def _send_to_discord(text, author=None, content=None):
+    payload = {"text": text}
+    if author:
+        # Für den Webhook-Versand: Spieler als Absender, Nachricht ohne Präfix
+        payload.update(author=author, content=content)
+    batch = _DISCORD_BATCH.get()
+    if batch is not None:
+        batch.append(payload)
+        return
+    await _enqueue_discord(payload)
+
+
+async def _enqueue_discord(payload):
+    if JOURNAL is not None:
+        await JOURNAL.append(DIRECTION_DISCORD, payload)
+        return
+    try:
+        await _deliver_to_discord(payload)
+    except Exception as exc:
+        logger.warning("Discord Send fehlgeschlagen: %s", exc)
+
+
+async def _send_to_minecraft(text):
+    if JOURNAL is not None:
+        await JOURNAL.append(DIRECTION_MINECRAFT, {"text": text})
+        return
+    try:
+        await _deliver_to_minecraft({"text": text})
+    except Exception as exc:
+        logger.warning("RCON Send fehlgeschlagen: %s", exc)
+
+
+def _archive(direction, kind, player, content):
+    if ARCHIVE is not None:
+        ARCHIVE.record(direction, kind, player, content)
+
+
+async def handle_mc_event(payload):
+    # Gemeinsame Verarbeitung für alle MC→Discord-Eingänge (Webhook, Log-Tail)
+    event = payload.get("event")
+    content = payload.get("content") or ""
+    # Whitelist-Änderungen aus dem Server-Log nur im Cache nachziehen
+    if event in ("whitelist_added", "whitelist_removed"):
+        if content:
+            if event == "whitelist_added":
+                WHITELIST.add(content)
+            else:
+                WHITELIST.remove(content)
+            await WHITELIST.persist()
+        return "ok"
+    # Statistik, Presence und Archiv auch ohne Mirror-Channel führen; nur das Spiegeln entfällt
+    mirror = bool(CHAT_CHANNEL_ID_INT)
+    if event == "chat":
+        author = payload.get("author") or "MC"
+        if ECHO is not None and ECHO.is_minecraft_echo(payload.get("author"), content):
+            return "ignored"
+        _archive("minecraft", "chat", author, content)
+        STATS.record_chat(author)
+        if mirror:
+            await _send_to_discord(f"[MC] {author}: {content}", author=author, content=content)
+    elif event == "join":
+        if PRESENCE.join(content):
+            STATS.record_join(content)
+        _archive("minecraft", "join", content, "ist beigetreten")
+        if mirror:
+            await _send_to_discord(f"[MC] {content} ist beigetreten")
+    elif event == "leave":
+        PRESENCE.leave(content)
+        _archive("minecraft", "leave", content, "hat den Server verlassen")
+        if mirror:
+            await _send_to_discord(f"[MC] {content} hat den Server verlassen")
+    elif event == "death":
+        player = payload.get("player") or payload.get("author")
+        death_details = content.strip() if isinstance(content, str) else ""
+        if player and death_details:
+            discord_msg = f"[MC] 💀 {player} ist gestorben: {death_details}"
+        elif player:
+            discord_msg = f"[MC] 💀 {player} ist gestorben."
+        else:
+            discord_msg = f"[MC] 💀 {death_details or 'Ein Spieler ist gestorben.'}"
+        _archive("minecraft", "death", player, death_details or "ist gestorben")
+        STATS.record_death(player, death_details)
+        if mirror:
+            await _send_to_discord(discord_msg)
+        if HAS_RCON:
+            try:
+                reply = random.choice(DEATH_CHAT_RESPONSES)
+                if ECHO is not None:
+                    ECHO.remember(TO_MINECRAFT, f"[Bot] {reply}")
+                await RCON.run(PRIORITY_SYSTEM, lambda client: client.say(f"[Bot] {reply}"), retry=False)
+            except Exception as exc:
+                logger.warning("RCON Death Reply fehlgeschlagen: %s", exc)
+    elif event == "whitelistadd":
+        # optional, kann Client auslösen
+        try:
+            await add_to_whitelist(RCON, WHITELIST, str(content), PRIORITY_SYSTEM)
+        except Exception:
+            pass
+    if not mirror and event != "whitelistadd":
+        return "no mirror channel"
+    return "ok"
 
 
 @bot.event
 async def on_ready():
+    global _COMMANDS_REGISTERED
     logger.info("Bot Ready als %s (ID: %s)", bot.user, bot.user.id if bot.user else "?")
     logger.info("Verbunden mit %d Guild(s)", len(bot.guilds))
+    if SHARDED:
+        logger.info("Shards %s von %s, Primärprozess: %s", SHARD_IDS_LIST or "alle", bot.shard_count, "ja" if IS_PRIMARY else "nein")
     logger.info(
         "Features: bridge=%s, rcon=%s, query=%s, github=%s",
         "on" if HAS_BRIDGE else "off",
@@ -236,195 +1015,36 @@ async def on_ready():
         "on" if HAS_QUERY else "off",
         "on" if HAS_GITHUB else "off",
     )
-    if HAS_GITHUB:
-        bot.loop.create_task(task_github_updates(bot, logger, fetch_latest_commits, {
-            "HAS_GITHUB": HAS_GITHUB,
-            "WEBHOOK_ACTIVE": WEBHOOK_ACTIVE,
-            "GITHUB_POLL_INTERVAL": GITHUB_POLL_INTERVAL,
-            "GITHUB_UPDATES_CHANNEL_ID_INT": GITHUB_UPDATES_CHANNEL_ID_INT,
-            "GITHUB_REPO": GITHUB_REPO,
-        }))
-    if WEBHOOK_ACTIVE:
-        async def verify_and_handle_github(request):
-            import hmac, hashlib
-            signature = request.headers.get("X-Hub-Signature-256", "")
-            event = request.headers.get("X-GitHub-Event", "")
-            body = await request.read()
-            expected = "sha256=" + hmac.new(GITHUB_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
-            if not hmac.compare_digest(signature, expected):
-                from aiohttp import web
-                return web.Response(status=401, text="invalid signature")
-            try:
-                payload = json.loads(body.decode("utf-8"))
-            except Exception:
-                from aiohttp import web
-                return web.Response(status=400, text="invalid json")
-            if event == "push":
-                repo_full_name = (payload.get("repository") or {}).get("full_name")
-                if GITHUB_REPO and repo_full_name and GITHUB_REPO != repo_full_name:
-                    from aiohttp import web
-                    return web.Response(status=202, text="ignored repo")
-                channel_id = GITHUB_UPDATES_CHANNEL_ID_INT
-                if not channel_id:
-                    from aiohttp import web
-                    return web.Response(status=202, text="no channel configured")
-                channel = bot.get_channel(channel_id)
-                if channel is None:
-                    try:
-                        channel = await bot.fetch_channel(channel_id)
-                    except Exception:
-                        from aiohttp import web
-                        return web.Response(status=202, text="channel not found")
-                commits = payload.get("commits") or []
-                if not commits and payload.get("head_commit"):
-                    commits = [payload.get("head_commit")]
-                for c in commits:
-                    author = ((c.get("author") or {}).get("name")) or "?"
-                    message = c.get("message") or ""
-                    url = c.get("url") or ""
-                    await channel.send(f"[GitHub] {author}: {message}\n{url}")
-                from aiohttp import web
-                return web.Response(text="ok")
-            elif event == "pull_request":
-                repo_full_name = (payload.get("repository") or {}).get("full_name")
-                if GITHUB_REPO and repo_full_name and GITHUB_REPO != repo_full_name:
-                    from aiohttp import web
-                    return web.Response(status=202, text="ignored repo")
-                channel_id = GITHUB_UPDATES_CHANNEL_ID_INT
-                if not channel_id:
-                    from aiohttp import web
-                    return web.Response(status=202, text="no channel configured")
-                channel = bot.get_channel(channel_id)
-                if channel is None:
-                    try:
-                        channel = await bot.fetch_channel(channel_id)
-                    except Exception:
-                        from aiohttp import web
-                        return web.Response(status=202, text="channel not found")
-                action = payload.get("action", "")
-                pr = payload.get("pull_request") or {}
-                pr_number = pr.get("number", "?")
-                pr_title = pr.get("title", "Unbekannt")
-                pr_url = pr.get("html_url", "")
-                pr_user = (pr.get("user") or {}).get("login", "?")
-                pr_state = pr.get("state", "")
-                
-                # Nachrichten für verschiedene PR-Aktionen
-                if action == "opened":
-                    msg = f"🔔 **Neue Pull Request #{pr_number}** von **{pr_user}**\n**Titel:** {pr_title}\n{pr_url}"
-                elif action == "closed":
-                    if pr.get("merged", False):
-                        merged_by = (pr.get("merged_by") or {}).get("login", "?")
-                        msg = f"✅ **Pull Request #{pr_number} gemerged** von **{merged_by}**\n**Titel:** {pr_title}\n{pr_url}"
-                    else:
-                        msg = f"❌ **Pull Request #{pr_number} geschlossen** (nicht gemerged)\n**Titel:** {pr_title}\n{pr_url}"
-                elif action == "reopened":
-                    msg = f"🔄 **Pull Request #{pr_number} wiedereröffnet** von **{pr_user}**\n**Titel:** {pr_title}\n{pr_url}"
-                elif action == "ready_for_review":
-                    msg = f"👀 **Pull Request #{pr_number} ist bereit für Review**\n**Titel:** {pr_title}\n{pr_url}"
-                elif action == "review_requested":
-                    requested_reviewer = (payload.get("requested_reviewer") or {}).get("login", "?")
-                    msg = f"👥 **Review angefordert** für PR #{pr_number} von **{requested_reviewer}**\n**Titel:** {pr_title}\n{pr_url}"
-                else:
-                    # Andere Aktionen ignorieren oder generisch behandeln
-                    from aiohttp import web
-                    return web.Response(status=202, text=f"ignored action: {action}")
-                
-                await channel.send(msg)
-                from aiohttp import web
-                return web.Response(text="ok")
-            from aiohttp import web
-            return web.Response(text="ignored")
-        async def verify_and_handle_mc(request):
-            from aiohttp import web
-            mc_secret = os.getenv("MC_WEBHOOK_SECRET")
-            if not mc_secret:
-                return web.Response(status=404)
-            sig = request.headers.get("X-MC-Signature", "")
-            body = await request.read()
-            expected = "sha256=" + __import__("hashlib").sha256((mc_secret).encode("utf-8") + body).hexdigest()
-            if sig != expected:
-                return web.Response(status=401, text="invalid signature")
-            try:
-                payload = json.loads(body.decode("utf-8"))
-            except Exception:
-                return web.Response(status=400, text="invalid json")
-
-            event = payload.get("event")
-            content = payload.get("content") or ""
-            channel_id = CHAT_CHANNEL_ID_INT
-            if not channel_id:
-                return web.Response(status=202, text="no mirror channel")
-            channel = bot.get_channel(channel_id)
-            if channel is None:
-                try:
-                    channel = await bot.fetch_channel(channel_id)
-                except Exception:
-                    return web.Response(status=202, text="channel not found")
-            if event == "chat":
-                author = payload.get("author") or "MC"
-                await channel.send(f"[MC] {author}: {content}")
-            elif event == "join":
-                await channel.send(f"[MC] {content} ist beigetreten")
-            elif event == "leave":
-                await channel.send(f"[MC] {content} hat den Server verlassen")
-            elif event == "death":
-                player = payload.get("player") or payload.get("author")
-                death_details = content.strip() if isinstance(content, str) else ""
-                if player and death_details:
-                    discord_msg = f"[MC] 💀 {player} ist gestorben: {death_details}"
-                elif player:
-                    discord_msg = f"[MC] 💀 {player} ist gestorben."
-                else:
-                    discord_msg = f"[MC] 💀 {death_details or 'Ein Spieler ist gestorben.'}"
-                await channel.send(discord_msg)
-                if HAS_RCON:
-                    try:
-                        with Client(SERVER_IP, RCON_PORT_INT, passwd=RCON_PASSWORD) as client:
-                            reply = random.choice(DEATH_CHAT_RESPONSES)
-                            client.say(f"[Bot] {reply}")
-                    except Exception as exc:
-                        logger.warning("RCON Death Reply fehlgeschlagen: %s", exc)
-            elif event == "whitelistadd":
-                # optional, kann Client auslösen
-                try:
-                    with Client(SERVER_IP, RCON_PORT_INT, passwd=RCON_PASSWORD) as client:
-                        wl = client.whitelist
-                        wl.add(str(content))
-                except Exception:
-                    pass
-            return web.Response(text="ok")
-        bot.loop.create_task(task_start_web(bot, logger, {"PORT": os.getenv("PORT")}, verify_and_handle_github, verify_and_handle_mc))
-    # Auto-Cleanup-Job starten (zentrale Implementierung aus app.tasks nutzen)
-    if CHAT_CHANNEL_ID_INT and (MESSAGE_CLEANUP_RETENTION_HOURS_INT or 0) > 0:
-        bot.loop.create_task(task_cleanup(bot, logger, {
-            "CHAT_CHANNEL_ID_INT": CHAT_CHANNEL_ID_INT,
-            "MESSAGE_CLEANUP_RETENTION_HOURS_INT": MESSAGE_CLEANUP_RETENTION_HOURS_INT,
-            "MESSAGE_CLEANUP_INTERVAL_MINUTES_INT": MESSAGE_CLEANUP_INTERVAL_MINUTES_INT,
-        }))
-    # Countdown-Job starten
-    if COUNTDOWN_CHANNEL_ID_INT and COUNTDOWN_TARGET_ISO:
-        bot.loop.create_task(task_countdown(
-            bot,
-            logger,
-            {
-                "COUNTDOWN_CHANNEL_ID_INT": COUNTDOWN_CHANNEL_ID_INT,
-                "COUNTDOWN_TARGET_ISO": COUNTDOWN_TARGET_ISO,
-                "COUNTDOWN_TZ": COUNTDOWN_TZ,
-                "COUNTDOWN_ROLE_ID_INT": COUNTDOWN_ROLE_ID_INT,
-                "COUNTDOWN_TIMER_MESSAGE": COUNTDOWN_TIMER_MESSAGE,
-            },
-            task_parse_iso,
-            task_fmt_td,
-            lambda: COUNTDOWN_LAST_AUTO_MESSAGE_ID,
-            lambda mid: _save_last_countdown_auto_message_id(mid),
-            lambda: COUNTDOWN_TIMER_MESSAGE_SENT,
-            lambda sent: _save_timer_message_sent_flag(sent)
-        ))
-    # Commands registrieren
-    deps = {
-        "mcipc_Client": Client,
-        "QueryClient": QueryClient,
+    _sync_background_jobs()
+    # Commands nur einmal registrieren (on_ready läuft nach jedem Reconnect erneut)
+    if _COMMANDS_REGISTERED:
+        return
+    global _COMMAND_DEPS
+    _COMMAND_DEPS = deps = _build_command_deps()
+    builtin = {command.name for command in bot.commands}
+    try:
+        register_text_commands(bot, deps)
+        register_slash_commands(bot, deps)
+    except Exception as exc:
+        # Halb registrierte Commands entfernen, damit das nächste on_ready es erneut versucht
+        logger.error("Commands konnten nicht registriert werden: %s", exc)
+        for command in list(bot.commands):
+            if command.name not in builtin:
+                bot.remove_command(command.name)
+        bot.tree.clear_commands(guild=None)
+        return
+    _COMMANDS_REGISTERED = True
+    try:
+        await bot.tree.sync()
+        logger.info("Slash-Commands synchronisiert")
+    except Exception as exc:
+        logger.warning("Slash-Commands Sync fehlgeschlagen: %s", exc)
+
+
+def _build_command_deps():
+    return {
+        "query_stats": _query_stats,
+        "health_status": _health_status,
         "CHAT_CHANNEL_ID_INT": CHAT_CHANNEL_ID_INT,
         "HAS_RCON": HAS_RCON,
         "SERVER_IP": SERVER_IP,
@@ -438,13 +1058,8 @@ async def on_ready():
         "parse_iso_to_dt": task_parse_iso,
         "COUNTDOWN_TZ": COUNTDOWN_TZ,
         "fmt_td": task_fmt_td,
-        "get_last_msg_id": lambda: COUNTDOWN_LAST_MESSAGE_ID,
-        "set_last_msg_id": lambda mid: _save_last_countdown_message_id(mid),
-        "get_last_auto_msg_id": lambda: COUNTDOWN_LAST_AUTO_MESSAGE_ID,
-        "get_last_trigger_id": lambda: COUNTDOWN_LAST_TRIGGER_ID,
-        "set_last_trigger_id": lambda mid: _save_last_countdown_trigger_id(mid),
-        "load_config": load_config,
-        "save_config": save_config,
+        "ephemeral": EPHEMERAL,
+        "update_config": update_config,
         "apply_config": _apply_runtime_config,
         "collect_config_display": lambda: json.dumps({
             "command_prefix": COMMAND_PREFIX,
@@ -458,8 +1073,8 @@ async def on_ready():
             "countdown_target_iso": COUNTDOWN_TARGET_ISO,
             "countdown_timezone": COUNTDOWN_TZ,
             "countdown_role_id": COUNTDOWN_ROLE_ID_INT,
-            "countdown_last_message_id": COUNTDOWN_LAST_MESSAGE_ID,
-            "countdown_last_auto_message_id": COUNTDOWN_LAST_AUTO_MESSAGE_ID,
+            "status_channel_id": STATUS_CHANNEL_ID_INT,
+            "ephemeral_messages": len(EPHEMERAL.snapshot()),
             "countdown_timer_message": COUNTDOWN_TIMER_MESSAGE,
             "countdown_timer_message_sent": COUNTDOWN_TIMER_MESSAGE_SENT,
             "features": {
@@ -470,32 +1085,73 @@ async def on_ready():
             },
         }, ensure_ascii=False, indent=2),
         "reset_last_commit": lambda: None,
+        "job_status": SUPERVISOR.status,
+        "presence": PRESENCE,
+        "archive": ARCHIVE,
+        "stats": STATS,
+        "status_board": STATUS_BOARD,
+        "rcon": RCON,
+        "whitelist": WHITELIST,
+        "is_primary": IS_PRIMARY,
     }
-    register_text_commands(bot, deps)
-    register_slash_commands(bot, deps)
-    try:
-        await bot.tree.sync()
-        logger.info("Slash-Commands synchronisiert")
-    except Exception as exc:
-        logger.warning("Slash-Commands Sync fehlgeschlagen: %s", exc)
+
+
+@bot.event
+async def on_shard_connect(shard_id):
+    SHARD_METRICS.connected(shard_id)
+
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    SHARD_METRICS.disconnected(shard_id)
+
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    SHARD_METRICS.resumed(shard_id)
+
+
+@bot.event
+async def on_connect():
+    if not SHARDED:
+        SHARD_METRICS.connected(0)
+
+
+@bot.event
+async def on_disconnect():
+    if not SHARDED:
+        SHARD_METRICS.disconnected(0)
+
+
+@bot.event
+async def on_resumed():
+    if not SHARDED:
+        SHARD_METRICS.resumed(0)
 
 
 @bot.event
 async def on_message(message):
-    await bot.process_commands(message)
-    if (await bot.get_context(message)).command is not None:
-        return
-    if message.author == bot.user or message.author.bot:
+    if RECORDER is not None:
+        RECORDER.message(message)
+    SHARD_METRICS.message(getattr(message.guild, "shard_id", None))
+    # Webhook-Nachrichten (gespiegelter MC-Chat) nicht zurück ins Spiel senden
+    if message.author.bot or message.webhook_id:
         return
-    if not HAS_BRIDGE:
+    # Fast-Path: irrelevante Nachrichten ohne Command-Parsing verwerfen
+    route = route_message(DISPATCH_TABLE, message.channel.id, message.content)
+    if route is None:
         return
-    if message.channel.id != CHAT_CHANNEL_ID_INT:
+    if route == ROUTE_COMMAND:
+        ctx = await bot.get_context(message)
+        if ctx.command is not None:
+            await bot.invoke(ctx)
+            return
+        if message.channel.id not in DISPATCH_TABLE["bridge_channels"]:
+            return
+    if ECHO is not None and ECHO.is_discord_echo(message.content):
         return
-    try:
-        with Client(SERVER_IP, RCON_PORT_INT, passwd=RCON_PASSWORD) as client:
-            client.say("[Discord] " + message.author.name + ": " + message.content)
-    except Exception as exc:
-        logger.warning("RCON Send fehlgeschlagen: %s", exc)
+    _archive("discord", "chat", message.author.name, message.content)
+    await _send_to_minecraft("[Discord] " + message.author.name + ": " + message.content)
 
 
 
@@ -507,32 +1163,11 @@ async def on_message(message):
 
 
 
-def _save_last_countdown_message_id(mid: int) -> None:
-    global COUNTDOWN_LAST_MESSAGE_ID
-    COUNTDOWN_LAST_MESSAGE_ID = mid
-    data = load_config()
-    data["countdown_last_message_id"] = mid
-    save_config(data)
-
-def _save_last_countdown_auto_message_id(mid: int) -> None:
-    global COUNTDOWN_LAST_AUTO_MESSAGE_ID
-    COUNTDOWN_LAST_AUTO_MESSAGE_ID = mid
-    data = load_config()
-    data["countdown_last_auto_message_id"] = mid
-    save_config(data)
-
-def _save_last_countdown_trigger_id(mid: int) -> None:
-    global COUNTDOWN_LAST_TRIGGER_ID
-    COUNTDOWN_LAST_TRIGGER_ID = mid
-    data = load_config()
-    data["countdown_last_trigger_id"] = mid
-    save_config(data)
-
 def _save_timer_message_sent_flag(sent: bool) -> None:
     global COUNTDOWN_TIMER_MESSAGE_SENT
     COUNTDOWN_TIMER_MESSAGE_SENT = sent
-    data = load_config()
-    data["countdown_timer_message_sent"] = sent
-    save_config(data)
+    update_config({"countdown_timer_message_sent": sent})
 
-bot.run(TOKEN)
+# Beim Import (z. B. durch app.replay) nicht verbinden
+if __name__ == "__main__":
+    bot.run(TOKEN)